@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 # Copyright (c) OpenAI. All rights reserved.
 import argparse
+import hashlib
+import os
 import re
+import shutil
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from math import ceil
-from os import listdir
-from os.path import basename, expanduser, isfile, join, splitext
-from typing import Literal
+from os import listdir, makedirs, replace
+from os.path import abspath, basename, dirname, expanduser, isfile, join, splitext
+from typing import Literal, cast
 
-from ensure_raster_image import SUPPORTED_EXTS, ensure_raster_image  # type: ignore
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from ensure_raster_image import (  # type: ignore
+    INKSCAPE_EXTS,
+    PAGE_EXTS,
+    RASTER_EXTS,
+    SUPPORTED_EXTS,
+    ensure_raster_image,
+    inkscape_batch_convert,
+)
+from PIL import Image, ImageDraw, ImageFont
+
+# Default pixel budget per montage sheet: Pillow's decompression-bomb threshold, so sheets can
+# be reopened without warnings and the canvas stays around 270 MB.
+DEFAULT_MAX_PIXELS = 89_478_485
 
 
 def _make_placeholder(w: int, h: int) -> Image.Image:
@@ -22,33 +38,130 @@ def _make_placeholder(w: int, h: int) -> Image.Image:
     return ph
 
 
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_path(path: str, cache_dir: str | None, cell_size: tuple[int, int]) -> str | None:
+    """Where the converted PNG for `path` lives in `cache_dir` (keyed by content hash).
+
+    PDF/EPS/PS renders depend on the cell size, so it is part of their key.
+    """
+    ext = splitext(path)[1].lower()
+    if not cache_dir or ext in RASTER_EXTS:
+        return None
+    suffix = f"-{cell_size[0]}x{cell_size[1]}" if ext in PAGE_EXTS else ""
+    try:
+        return join(cache_dir, _file_digest(path) + suffix + ".png")
+    except OSError:
+        return None
+
+
+def _store_cached(converted: str, cached: str) -> None:
+    makedirs(dirname(cached), exist_ok=True)
+    # Copy then rename so concurrent montages never read a partial PNG.
+    tmp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(converted, tmp_path)
+    replace(tmp_path, cached)
+
+
 def _load_images_with_placeholders(
-    input_files: list[str], retain_converted_files: bool, fail_on_image_error: bool = False
-) -> tuple[list[str], list[Image.Image | None]]:
+    input_files: list[str],
+    convert_dir: str | None,
+    fail_on_image_error: bool = False,
+    jobs: int | None = None,
+    cache_dir: str | None = None,
+    cell_size: tuple[int, int] = (400, 225),
+) -> tuple[list[str], list[str | None]]:
+    """Convert the inputs in order and return raster paths; None marks an image that failed.
+
+    Converted files go to per-input subdirectories of `convert_dir` (None: next to the inputs),
+    which must outlive the returned paths. Only image headers are read here; pixels are
+    decoded one at a time by compose_montage.
+
+    SVG/EMF/WMF inputs are batched through long-lived Inkscape shells; other conversions
+    (ImageMagick, Ghostscript, ...) run on up to `jobs` threads (default: usable CPUs), and
+    each Ghostscript run gets an equal share of the CPUs as rendering threads.
+    PDF/EPS/PS pages are rendered just large enough to fill `cell_size`.
+    With `cache_dir`, converted PNGs are reused across runs.
+    """
     labels = [basename(p) for p in input_files]
-    images: list[Image.Image | None] = []
-    if retain_converted_files:
-        for p in input_files:
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    if jobs is None:
+        jobs = cpus
+    gs_threads = max(1, (cpus or 1) // max(1, jobs or 1))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs or 1)) as executor:
+        # One directory per input so same-named inputs never overwrite each other.
+        out_dirs = []
+        for i in range(len(input_files)):
+            out_dirs.append(join(convert_dir, str(i)) if convert_dir else None)
+            if out_dirs[-1]:
+                makedirs(out_dirs[-1])
+        cached = list(executor.map(lambda p: _cache_path(p, cache_dir, cell_size), input_files))
+
+        batch_outs = {
+            i: join(out_dirs[i] or dirname(p), splitext(basename(p))[0] + ".png")
+            for i, p in enumerate(input_files)
+            if splitext(p)[1].lower() in INKSCAPE_EXTS and not (cached[i] and isfile(cached[i]))
+        }
+        done = inkscape_batch_convert([(input_files[i], o) for i, o in batch_outs.items()], jobs)
+
+        def load(index: int, path: str) -> str | None:
             try:
-                images.append(Image.open(ensure_raster_image(p)))
+                if cached[index] and isfile(cached[index]):
+                    converted = cached[index]
+                else:
+                    converted = batch_outs.get(index)
+                    if converted not in done:
+                        converted = ensure_raster_image(
+                            path, out_dirs[index], cell_size, threads=gs_threads
+                        )
+                    if cached[index]:
+                        _store_cached(converted, cached[index])
+                with Image.open(converted):
+                    pass
+                return converted
             except Exception as e:
                 if fail_on_image_error:
                     raise
-                print(f'Warning: Failed to convert or load image "{p}": {e}')
-                images.append(None)
-    else:
-        with tempfile.TemporaryDirectory(prefix="montage_convert_") as tmp_conv:
-            for p in input_files:
-                try:
-                    images.append(Image.open(ensure_raster_image(p, tmp_conv)))
-                except Exception as e:
-                    if fail_on_image_error:
-                        raise
-                    print(f'Warning: Failed to convert or load image "{p}": {e}')
-                    images.append(None)
+                print(f'Warning: Failed to convert or load image "{path}": {e}')
+                return None
+
+        images = list(executor.map(load, range(len(input_files)), input_files))
     return labels, images
 
 
+def _fit_to_cell(source: Image.Image | str, cell_w: int, cell_h: int) -> Image.Image:
+    """Decode `source` no larger than needed and resize it to fit inside the cell.
+
+    JPEGs are decoded at a reduced DCT scale via draft(); other formats are box-reduced before
+    the LANCZOS pass. Only sources with transparency are converted to RGBA.
+    """
+    opened = Image.open(source) if isinstance(source, str) else None
+    img = opened or cast(Image.Image, source)
+    try:
+        w, h = img.size
+        if w * cell_h > h * cell_w:
+            size = (cell_w, max(1, round(h * cell_w / w)))
+        else:
+            size = (max(1, round(w * cell_h / h)), cell_h)
+        if size[0] < w:
+            img.draft(None, size)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        # RGB/L images with a tRNS colour key must go to RGBA too, or the key colour shows.
+        if img.mode not in ("RGB", "RGBA", "L") or (has_alpha and img.mode != "RGBA"):
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    finally:
+        if opened is not None:
+            opened.close()
+
+
 def _natural_key(s: str) -> list:
     """Key function for natural sorting (e.g., Slide2 before Slide10)."""
     return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", s)]
@@ -64,8 +177,11 @@ def create_montage(
     label_mode: Literal["number", "filename", "none"],
     retain_converted_files: bool = False,
     fail_on_image_error: bool = False,
-) -> None:
-    """Build a montage with a fixed number of columns.
+    jobs: int | None = None,
+    cache_dir: str | None = None,
+    max_pixels: int | None = DEFAULT_MAX_PIXELS,
+) -> list[str]:
+    """Build a montage with a fixed number of columns and return the written sheet paths.
 
     Each cell has size `cell_w` x `cell_h`. Every input image is resized isotropically to fit inside
     the cell. `gap` controls spacing around and between cells (outer margin equals gap).
@@ -73,19 +189,46 @@ def create_montage(
       - "none": no labels are drawn
       - "number": draw a 1-based index beneath each image
       - "filename": draw the filename (no directory) beneath each image
+    Conversions run on up to `jobs` threads; `cache_dir` keeps converted PNGs keyed by the
+    input's content hash so repeat montages skip conversion.
+    If the canvas would exceed `max_pixels`, whole rows are split across several sheets named
+    `<stem>-1<ext>`, `<stem>-2<ext>`, ... (None or 0 always writes a single sheet).
     """
+    with tempfile.TemporaryDirectory(prefix="montage_convert_") as tmp_conv:
+        labels, images = _load_images_with_placeholders(
+            input_files=input_files,
+            convert_dir=None if retain_converted_files else tmp_conv,
+            fail_on_image_error=fail_on_image_error,
+            jobs=jobs,
+            cache_dir=cache_dir,
+            cell_size=(cell_w, cell_h),
+        )
+        return compose_montage(
+            images, labels, output_file, num_col, cell_w, cell_h, gap, label_mode, max_pixels
+        )
+
+
+def compose_montage(
+    images: list[Image.Image | str | None],
+    labels: list[str],
+    output_file: str,
+    num_col: int,
+    cell_w: int,
+    cell_h: int,
+    gap: int,
+    label_mode: Literal["number", "filename", "none"],
+    max_pixels: int | None = DEFAULT_MAX_PIXELS,
+) -> list[str]:
+    """Lay out images or image paths (None for a placeholder) and save the montage sheets.
 
+    Paths are opened, shrunk and pasted one at a time, so memory does not grow with the number
+    of inputs. See create_montage for the meaning of the layout arguments.
+    """
     if num_col <= 0:
         raise ValueError("num_col must be positive")
     if cell_w <= 0 or cell_h <= 0:
         raise ValueError("cell_w and cell_h must be positive")
 
-    labels, images = _load_images_with_placeholders(
-        input_files=input_files,
-        retain_converted_files=retain_converted_files,
-        fail_on_image_error=fail_on_image_error,
-    )
-
     num_images = len(images)
     num_valid = sum(1 for im in images if im is not None)
     if num_valid == 0:
@@ -124,72 +267,132 @@ def create_montage(
     row_h = cell_h + label_height
 
     canvas_w = cols * cell_w + (cols + 1) * gap
-    canvas_h = rows * row_h + (rows + 1) * gap
-    # Light grey canvas background as in typical slide sorter view
-    canvas = Image.new("RGB", (canvas_w, canvas_h), (242, 242, 242))
-    draw = ImageDraw.Draw(canvas)
-
-    for idx, img in enumerate(images):
-        col = idx % cols
-        row = idx // cols
-
-        # Top-left corner of the cell including outer margin and gaps
-        x0 = gap + col * (cell_w + gap)
-        y0 = gap + row * (row_h + gap)
-
-        # Fit the image within the cell while preserving aspect ratio
-        if label_mode == "number":
-            label = str(idx + 1)
-        elif label_mode == "filename":
-            label = labels[idx]
-        else:
-            label = ""
-
-        if draw_labels:
-            bbox = draw.textbbox((0, 0), label, font=font)
-            text_w = bbox[2] - bbox[0]
-        else:
-            text_w = 0
+    rows_per_sheet = rows
+    if max_pixels:
+        rows_per_sheet = max(1, (max_pixels // canvas_w - gap) // (row_h + gap))
+    num_sheets = ceil(rows / rows_per_sheet)
+    stem, ext = splitext(output_file)
+    output_files = []
+
+    for sheet in range(num_sheets):
+        first_row = sheet * rows_per_sheet
+        sheet_rows = min(rows_per_sheet, rows - first_row)
+        canvas_h = sheet_rows * row_h + (sheet_rows + 1) * gap
+        # Light grey canvas background as in typical slide sorter view
+        canvas = Image.new("RGB", (canvas_w, canvas_h), (242, 242, 242))
+        draw = ImageDraw.Draw(canvas)
+
+        for idx in range(first_row * cols, min((first_row + sheet_rows) * cols, num_images)):
+            img = images[idx]
+            col = idx % cols
+            row = idx // cols
+
+            # Top-left corner of the cell including outer margin and gaps
+            x0 = gap + col * (cell_w + gap)
+            y0 = gap + (row - first_row) * (row_h + gap)
+
+            # Fit the image within the cell while preserving aspect ratio
+            if label_mode == "number":
+                label = str(idx + 1)
+            elif label_mode == "filename":
+                label = labels[idx]
+            else:
+                label = ""
+
+            if draw_labels:
+                bbox = draw.textbbox((0, 0), label, font=font)
+                text_w = bbox[2] - bbox[0]
+            else:
+                text_w = 0
+
+            if img is not None:
+                resized = _fit_to_cell(img, cell_w, cell_h)
+            else:
+                print(
+                    f"Warning: Using placeholder for invalid image at row={row + 1}, col={col + 1}"
+                )
+                assert placeholder is not None
+                resized = placeholder
+
+            paste_x = x0 + (cell_w - resized.width) // 2
+            paste_y = y0 + (cell_h - resized.height) // 2
+            canvas.paste(
+                resized,
+                (paste_x, paste_y),
+                mask=resized.split()[3] if resized.mode == "RGBA" else None,
+            )
 
-        if img:
-            resized = ImageOps.contain(
-                img.convert("RGBA"),
-                (cell_w, cell_h),
-                method=Image.Resampling.LANCZOS,
+            border_color = (160, 160, 160)
+            bw = 1
+            draw.rectangle(
+                [
+                    paste_x - bw,
+                    paste_y - bw,
+                    paste_x + resized.width,
+                    paste_y + resized.height,
+                ],
+                outline=border_color,
+                width=bw,
             )
-        else:
-            print(f"Warning: Using placeholder for invalid image at row={row + 1}, col={col + 1}")
-            assert placeholder is not None
-            resized = placeholder
-
-        paste_x = x0 + (cell_w - resized.width) // 2
-        paste_y = y0 + (cell_h - resized.height) // 2
-        canvas.paste(
-            resized,
-            (paste_x, paste_y),
-            mask=resized.split()[3] if resized.mode == "RGBA" else None,
-        )
 
-        border_color = (160, 160, 160)
-        bw = 1
-        draw.rectangle(
-            [
-                paste_x - bw,
-                paste_y - bw,
-                paste_x + resized.width,
-                paste_y + resized.height,
-            ],
-            outline=border_color,
-            width=bw,
-        )
+            if draw_labels:
+                tx = x0 + round((cell_w - text_w) / 2)
+                ty = y0 + cell_h + 3
+                draw.text((tx, ty), label, font=font, fill=(0, 0, 0))
+
+        output_path = output_file if num_sheets == 1 else f"{stem}-{sheet + 1}{ext}"
+        canvas.save(output_path)
+        canvas.close()
+        output_files.append(output_path)
+        print(f"Montage saved to {output_path}")
+    return output_files
 
-        if draw_labels:
-            tx = x0 + round((cell_w - text_w) / 2)
-            ty = y0 + cell_h + 3
-            draw.text((tx, ty), label, font=font, fill=(0, 0, 0))
 
-    canvas.save(output_file)
-    print(f"Montage saved to {output_file}")
+def montage_from_deck(
+    input_path: str,
+    output_file: str,
+    num_col: int,
+    cell_w: int,
+    cell_h: int,
+    gap: int,
+    label_mode: Literal["number", "filename", "none"],
+    slides_dir: str | None = None,
+    width: int = 1600,
+    height: int = 900,
+    fmt: str = "png",
+    jobs: int | None = None,
+    max_pixels: int | None = DEFAULT_MAX_PIXELS,
+    cache_dir: str | None = None,
+) -> list[str]:
+    """Render a deck or document and build its montage without re-reading slide images.
+
+    Pages are rasterised into memory and laid out directly. If `slides_dir` is given, the
+    individual slide images (at `width` x `height`) are written there in a background thread
+    while the montage is composed; otherwise pages are rasterised only at the cell size.
+    With `cache_dir`, the converted PDF is reused across runs.
+    """
+    # Imported here so plain image montages do not need poppler or LibreOffice.
+    import render_slides  # type: ignore
+
+    input_path = abspath(input_path)
+    box = (width, height) if slides_dir else (cell_w, cell_h)
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = render_slides.produce_pdf(input_path, convert_tmp_dir, cache_dir=cache_dir)
+        dpi = render_slides.choose_dpi(input_path, pdf_path, *box)
+        images = render_slides.rasterize_pdf_images(pdf_path, dpi, jobs=jobs)
+    ext = render_slides.IMAGE_EXTS[fmt]
+    labels = [f"slide-{num}.{ext}" for num in range(1, len(images) + 1)]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        writer = None
+        if slides_dir:
+            writer = executor.submit(render_slides.write_images, images, slides_dir, fmt)
+        output_files = compose_montage(
+            list(images), labels, output_file, num_col, cell_w, cell_h, gap, label_mode, max_pixels
+        )
+        if writer is not None:
+            writer.result()
+            print(f"Slides rendered to {slides_dir}")
+    return output_files
 
 
 def main() -> None:
@@ -202,6 +405,13 @@ def main() -> None:
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--input_files", nargs="+", help="List of input image file paths")
     group.add_argument("--input_dir", help="Directory containing input images")
+    group.add_argument(
+        "--input_deck",
+        help=(
+            "PowerPoint/PDF/other LibreOffice-readable file to render and montage in one pass, "
+            "without writing and re-reading intermediate slide images"
+        ),
+    )
     parser.add_argument(
         "--output_file",
         required=True,
@@ -242,6 +452,15 @@ def main() -> None:
             "image's filename (no directory), or 'none' for no labels"
         ),
     )
+    parser.add_argument(
+        "--max_pixels",
+        type=int,
+        default=DEFAULT_MAX_PIXELS,
+        help=(
+            "Pixel budget per montage sheet; larger grids are split by rows into "
+            f"<name>-1.<ext>, <name>-2.<ext>, ... (default: {DEFAULT_MAX_PIXELS}, 0 for no limit)"
+        ),
+    )
     parser.add_argument(
         "--retain_converted_files",
         action="store_true",
@@ -260,9 +479,46 @@ def main() -> None:
             "By default, failures are tolerated and placeholders are used."
         ),
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent image conversions (default: number of usable CPUs).",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        default=None,
+        help=(
+            "Directory for converted PNGs (or, with --input_deck, the deck's PDF) keyed by the "
+            "input's content hash, so repeat montages skip SVG/EMF/PDF/... conversion."
+        ),
+    )
+    parser.add_argument(
+        "--slides_dir",
+        default=None,
+        help=(
+            "With --input_deck, also write the individual slide PNGs (1600x900) to this "
+            "directory in the background."
+        ),
+    )
     args = parser.parse_args()
 
     output_path = expanduser(args.output_file)
+    if args.input_deck:
+        montage_from_deck(
+            input_path=expanduser(args.input_deck),
+            output_file=output_path,
+            num_col=args.num_col,
+            cell_w=args.cell_width,
+            cell_h=args.cell_height,
+            gap=args.gap,
+            label_mode=args.label_mode,
+            slides_dir=expanduser(args.slides_dir) if args.slides_dir else None,
+            jobs=args.jobs,
+            max_pixels=args.max_pixels,
+            cache_dir=expanduser(args.cache_dir) if args.cache_dir else None,
+        )
+        return
     if args.input_files:
         input_files = [expanduser(p) for p in args.input_files]
     else:
@@ -287,6 +543,9 @@ def main() -> None:
         label_mode=args.label_mode,
         retain_converted_files=args.retain_converted_files,
         fail_on_image_error=args.fail_on_image_error,
+        jobs=args.jobs,
+        cache_dir=expanduser(args.cache_dir) if args.cache_dir else None,
+        max_pixels=args.max_pixels,
     )
 
 
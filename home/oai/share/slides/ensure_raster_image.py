@@ -8,13 +8,19 @@ preview image assets extracted from PowerPoint files.
 Dependencies used by this tool:
 - Inkscape: SVG/EMF/WMF rasterization
 - ImageMagick: format bridging (TIFF→PNG, generic convert)
-- Ghostscript: PDF/EPS/PS rasterization (first page)
+- Ghostscript: PDF/EPS/PS rasterization (first page, or selected pages with --pages)
 - libheif-examples: heif-convert for HEIC/HEIF → PNG
 - jxr-tools (or libjxr-tools on older distros): JxrDecApp for JPEG XR (JXR/WDP)
+- poppler-utils (optional): pdfinfo, to size PDF pages to --max_width/--max_height
+
+Optional Python decoders, used in-process when importable (the CLI tools remain the fallback):
+- pillow-heif: HEIC/HEIF
+- cairosvg: SVG/SVGZ without filters, foreignObject or textPath
+- imagecodecs: JPEG XR (JXR/WDP)
 
 Install (Ubuntu/Debian):
   sudo apt-get update
-  sudo apt-get install -y inkscape imagemagick ghostscript libheif-examples jxr-tools
+  sudo apt-get install -y inkscape imagemagick ghostscript libheif-examples jxr-tools poppler-utils
   # If jxr-tools not found on your distro, try:
   # sudo apt-get install -y libjxr-tools
 
@@ -28,10 +34,30 @@ Verify:
 
 import argparse
 import gzip
+import os
+import re
 import shutil
-from os import listdir
+from concurrent.futures import ThreadPoolExecutor
+from os import listdir, remove, rename
 from os.path import basename, dirname, expanduser, isfile, join, splitext
-from subprocess import run
+from subprocess import DEVNULL, PIPE, CalledProcessError, Popen, TimeoutExpired, run
+
+try:
+    import pillow_heif  # type: ignore
+
+    pillow_heif.register_heif_opener()
+except ImportError:
+    pillow_heif = None
+
+try:
+    import cairosvg  # type: ignore
+except (ImportError, OSError):  # OSError: the cairo shared library is missing
+    cairosvg = None
+
+try:
+    import imagecodecs  # type: ignore
+except ImportError:
+    imagecodecs = None
 
 RASTER_EXTS = {
     ".png",
@@ -67,18 +93,319 @@ CONVERTIBLE_EXTS = {
 
 SUPPORTED_EXTS = RASTER_EXTS | CONVERTIBLE_EXTS
 
+# SVG features cairosvg renders poorly or not at all; such files go to Inkscape.
+CAIROSVG_UNSUPPORTED = (b"<filter", b"<foreignObject", b"<textPath")
+
+# Page-description formats rendered by Ghostscript; these can have several pages.
+PAGE_EXTS = {".pdf", ".eps", ".ps"}
+
+# Ghostscript resolution when no target size is given.
+DEFAULT_DPI = 200
+
+# Formats rasterized by Inkscape, which can batch them through `inkscape --shell`.
+INKSCAPE_EXTS = {".emf", ".wmf", ".emz", ".wmz", ".svg", ".svgz"}
+
+# Generous per-file budget for one Inkscape shell before it is killed and its files retried.
+INKSCAPE_SHELL_TIMEOUT_PER_FILE_S = 60
+
 
 def _imagemagick_convert(src_path: str, dst_path: str) -> None:
     binary = shutil.which("magick") or "convert"
     run([binary, src_path, dst_path], check=True)
 
 
-def ensure_raster_image(path: str, out_dir: str | None = None) -> str:
+def _usable_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _parse_page_spec(pages: str) -> list[int]:
+    """Parse a page selection such as "1-3,5" into sorted, unique 1-based page numbers."""
+    result: set[int] = set()
+    for part in pages.split(","):
+        m = re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+)\s*)?", part)
+        if not m or int(m.group(1)) < 1 or int(m.group(2) or m.group(1)) < int(m.group(1)):
+            raise ValueError(f"Invalid page selection: {pages!r}")
+        result.update(range(int(m.group(1)), int(m.group(2) or m.group(1)) + 1))
+    return sorted(result)
+
+
+def _pdf_page_box_pts(path: str, pages: list[int] | None) -> tuple[float, float] | None:
+    """Largest (width, height) in points over `pages` (None: all pages), via pdfinfo."""
+    first, last = (pages[0], pages[-1]) if pages else (1, 1 << 30)
+    try:
+        out = run(
+            ["pdfinfo", "-f", str(first), "-l", str(last), path],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, CalledProcessError):
+        return None
+    sizes: dict[int, tuple[float, float]] = {}
+    rotated: set[int] = set()
+    for m in re.finditer(r"^Page\s+(\d+)\s+(size|rot):\s*(.*)$", out, re.MULTILINE):
+        page = int(m.group(1))
+        if m.group(2) == "size":
+            dims = re.match(r"(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)", m.group(3))
+            if dims:
+                sizes[page] = (float(dims.group(1)), float(dims.group(2)))
+        elif int(float(m.group(3))) % 180:
+            rotated.add(page)
+    boxes = [
+        (h, w) if page in rotated else (w, h)
+        for page, (w, h) in sizes.items()
+        if pages is None or page in pages
+    ]
+    if not boxes:
+        return None
+    return max(w for w, _ in boxes), max(h for _, h in boxes)
+
+
+def _dsc_bounding_box_pts(path: str) -> tuple[float, float] | None:
+    """(width, height) in points from the %%BoundingBox comment of an EPS/PS header."""
+    with open(path, "rb") as f:
+        head = f.read(65536)
+    if head.startswith(b"\xc5\xd0\xd3\xc6"):
+        # DOS EPS binary header: the PostScript section starts at the offset in bytes 4..7.
+        with open(path, "rb") as f:
+            f.seek(int.from_bytes(head[4:8], "little"))
+            head = f.read(65536)
+    text = head.decode("latin-1")
+    for key in ("%%HiResBoundingBox:", "%%BoundingBox:"):
+        m = re.search(re.escape(key) + r"\s*" + r"\s+".join([r"(-?\d+(?:\.\d+)?)"] * 4), text)
+        if m:
+            x0, y0, x1, y1 = (float(v) for v in m.groups())
+            if x1 > x0 and y1 > y0:
+                return x1 - x0, y1 - y0
+    return None
+
+
+def _target_dpi(path: str, pages: list[int] | None, max_size: tuple[int, int] | None) -> int:
+    """Resolution that fits the largest selected page inside `max_size` pixels."""
+    if max_size is None:
+        return DEFAULT_DPI
+    if splitext(path)[1].lower() == ".pdf":
+        box = _pdf_page_box_pts(path, pages)
+    else:
+        box = _dsc_bounding_box_pts(path)
+    if box is None:
+        return DEFAULT_DPI
+    width_pts, height_pts = box
+    return max(1, int(min(max_size[0] * 72 / width_pts, max_size[1] * 72 / height_pts)))
+
+
+def _ghostscript_render(
+    path: str, out_path: str, pages: list[int] | None, dpi: int, threads: int | None = None
+) -> None:
+    """Render `pages` (None: all) of a PDF/EPS/PS to PNG in one Ghostscript run.
+
+    `out_path` may contain %d, which Ghostscript numbers 1, 2, ... in output order.
+    `threads` is Ghostscript's band-rendering thread count (None: usable CPUs); callers running
+    several renders at once should split the CPUs between them.
+    """
+    gs = shutil.which("gs") or "gs"
+    cmd = [
+        gs,
+        "-dSAFER",
+        "-dBATCH",
+        "-dNOPAUSE",
+        "-sDEVICE=pngalpha",
+        f"-dNumRenderingThreads={threads or _usable_cpus()}",
+        f"-r{dpi}",
+    ]
+    if splitext(path)[1].lower() == ".eps":
+        # Render the EPS bounding box rather than a full default-size page.
+        cmd.append("-dEPSCrop")
+    if pages and pages == list(range(pages[0], pages[-1] + 1)):
+        cmd += [f"-dFirstPage={pages[0]}", f"-dLastPage={pages[-1]}"]
+    elif pages:
+        cmd.append("-sPageList=" + ",".join(str(n) for n in pages))
+    run(cmd + ["-o", out_path, path], check=True)
+
+
+def rasterize_pages(
+    path: str,
+    pages: str | None = None,
+    out_dir: str | None = None,
+    max_size: tuple[int, int] | None = None,
+    threads: int | None = None,
+) -> list[str]:
+    """Rasterize selected pages of a PDF/EPS/PS in one Ghostscript run.
+
+    `pages` is a selection such as "1-3,5" (None: every page). Pages are written as
+    `<stem>-p<N>.png`; with `max_size` (width, height) the resolution is chosen so the largest
+    selected page fits in that many pixels, otherwise DEFAULT_DPI is used. `threads` is passed
+    to Ghostscript as its rendering thread count (None: usable CPUs).
+    """
+    base, ext = splitext(path)
+    if ext.lower() not in PAGE_EXTS:
+        raise ValueError(f"Not a page-description format: {path}")
+    page_list = _parse_page_spec(pages) if pages else None
+    out_dir = out_dir or dirname(path)
+    stem = join(out_dir, basename(base))
+    dpi = _target_dpi(path, page_list, max_size)
+    _ghostscript_render(path, f"{stem}-gs%d.png", page_list, dpi, threads)
+
+    out_paths = []
+    index = 1
+    while isfile(f"{stem}-gs{index}.png"):
+        page = page_list[index - 1] if page_list and index <= len(page_list) else index
+        out_paths.append(f"{stem}-p{page}.png")
+        rename(f"{stem}-gs{index}.png", out_paths[-1])
+        index += 1
+    if not out_paths:
+        raise RuntimeError("Ghostscript reported success but no pages were written: " + path)
+    return out_paths
+
+
+def _svg_to_png_in_process(path: str, out_path: str) -> bool:
+    """Render a simple SVG/SVGZ with cairosvg; False means use Inkscape instead."""
+    if cairosvg is None:
+        return False
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        if any(tag in data for tag in CAIROSVG_UNSUPPORTED):
+            return False
+        cairosvg.svg2png(bytestring=data, url=path, write_to=out_path)
+    except Exception:
+        return False
+    return isfile(out_path)
+
+
+def _heif_to_png_in_process(path: str, out_path: str) -> bool:
+    """Decode a HEIC/HEIF with pillow-heif; False means use heif-convert instead."""
+    if pillow_heif is None:
+        return False
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.save(out_path)
+    except Exception:
+        return False
+    return isfile(out_path)
+
+
+def _jxr_to_png_in_process(path: str, out_path: str) -> bool:
+    """Decode an 8-bit JPEG XR with imagecodecs; False means use JxrDecApp instead."""
+    if imagecodecs is None:
+        return False
+    from PIL import Image
+
+    try:
+        with open(path, "rb") as f:
+            pixels = imagecodecs.jpegxr_decode(f.read())
+        if pixels.dtype != "uint8":
+            # HDR/16-bit/float images need ImageMagick's tone handling.
+            return False
+        Image.fromarray(pixels).save(out_path)
+    except Exception:
+        return False
+    return isfile(out_path)
+
+
+def _decompress_metafile(path: str, out_dir: str) -> str:
+    """Decompress an EMZ/WMZ into `out_dir` and return the EMF/WMF path."""
+    base, ext = splitext(path)
+    decompressed = join(out_dir, basename(base) + (".emf" if ext.lower() == ".emz" else ".wmf"))
+    with gzip.open(path, "rb") as zin, open(decompressed, "wb") as zout:
+        zout.write(zin.read())
+    return decompressed
+
+
+def _run_inkscape_shell(pairs: list[tuple[str, str]]) -> None:
+    """Export each (src, out_png) pair from a single `inkscape --shell` process."""
+    script = "".join(
+        f"file-open:{src};export-filename:{out};export-do;file-close\n" for src, out in pairs
+    )
+    proc = Popen(["inkscape", "--shell"], stdin=PIPE, stdout=DEVNULL, stderr=DEVNULL, text=True)
+    try:
+        proc.communicate(script, timeout=INKSCAPE_SHELL_TIMEOUT_PER_FILE_S * len(pairs))
+    except TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+
+
+def inkscape_batch_convert(pairs: list[tuple[str, str]], jobs: int | None = None) -> set[str]:
+    """Rasterize (src, out_png) pairs with one long-lived Inkscape shell per worker.
+
+    Inkscape's startup dominates per-file conversion, so files are split across up to `jobs`
+    shells (default: usable CPUs); simple SVGs are rendered in-process with cairosvg when it is
+    installed. Returns the output paths that were produced; callers should retry the rest with
+    ensure_raster_image() to get the per-file error.
+    """
+    if jobs is None:
+        jobs = _usable_cpus()
+    rendered = set()
+    todo = []
+    for src, out in pairs:
+        # Action arguments are split on ';' and lines, so such paths go through the per-file path.
+        if any(c in src + out for c in ";\n\r"):
+            continue
+        if isfile(out):
+            remove(out)
+        if splitext(src)[1].lower() in (".svg", ".svgz") and _svg_to_png_in_process(src, out):
+            rendered.add(out)
+            continue
+        if splitext(src)[1].lower() in (".emz", ".wmz"):
+            try:
+                src = _decompress_metafile(src, dirname(out))
+            except OSError:
+                continue
+        todo.append((src, out))
+    if not todo or shutil.which("inkscape") is None:
+        return rendered
+
+    jobs = max(1, min(jobs or 1, len(todo)))
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(_run_inkscape_shell, [todo[i::jobs] for i in range(jobs)]))
+    return rendered | {out for _, out in todo if isfile(out)}
+
+
+def ensure_raster_images(
+    paths: list[str],
+    out_dir: str | None = None,
+    jobs: int | None = None,
+    max_size: tuple[int, int] | None = None,
+) -> list[str]:
+    """ensure_raster_image() for many files, batching the Inkscape formats.
+
+    Inkscape inputs are first converted through inkscape_batch_convert(); anything it did not
+    produce, and every other format, goes through ensure_raster_image() one file at a time.
+    """
+    pairs = [
+        (p, join(out_dir or dirname(p), splitext(basename(p))[0] + ".png"))
+        for p in paths
+        if splitext(p)[1].lower() in INKSCAPE_EXTS
+    ]
+    batched = dict(pairs)
+    done = inkscape_batch_convert(pairs, jobs)
+    results = []
+    for p in paths:
+        out = batched.get(p)
+        results.append(out if out in done else ensure_raster_image(p, out_dir, max_size))
+    return results
+
+
+def ensure_raster_image(
+    path: str,
+    out_dir: str | None = None,
+    max_size: tuple[int, int] | None = None,
+    threads: int | None = None,
+) -> str:
     """Return a raster image path for the given input, converting when needed.
 
     - EMF/WMF/EMZ/WMZ are rasterized via Inkscape (EMZ/WMZ are decompressed first)
-    - SVG/SVGZ are rasterized via Inkscape
-    - WDP/JXR are converted via ImageMagick (if codec available)
+    - SVG/SVGZ are rasterized via Inkscape (simple ones in-process with cairosvg if installed)
+    - WDP/JXR are converted via ImageMagick (if codec available), or imagecodecs in-process
+    - HEIC/HEIF are converted via heif-convert, or pillow-heif in-process
+    - PDF/EPS/PS render their first page via Ghostscript, sized to fit `max_size` if given,
+      with `threads` rendering threads (None: usable CPUs)
     - Known raster formats are returned as-is
 
     Raises ValueError if the extension is not supported.
@@ -97,9 +424,7 @@ def ensure_raster_image(path: str, out_dir: str | None = None) -> str:
 
     if ext_lower in (".emz", ".wmz"):
         # Decompress into EMF/WMF then rasterize with Inkscape
-        decompressed = join(out_dir, basename(base) + (".emf" if ext_lower == ".emz" else ".wmf"))
-        with gzip.open(path, "rb") as zin, open(decompressed, "wb") as zout:
-            zout.write(zin.read())
+        decompressed = _decompress_metafile(path, out_dir)
         run(
             ["inkscape", decompressed, "-o", out_path],
             check=True,
@@ -109,12 +434,16 @@ def ensure_raster_image(path: str, out_dir: str | None = None) -> str:
         raise RuntimeError("inkscape reported success but output file not found: " + out_path)
 
     if ext_lower in (".svg", ".svgz"):
+        if _svg_to_png_in_process(path, out_path):
+            return out_path
         run(["inkscape", path, "-o", out_path], check=True)
         if isfile(out_path):
             return out_path
         raise RuntimeError("inkscape reported success but output file not found: " + out_path)
 
     if ext_lower in (".wdp", ".jxr"):
+        if _jxr_to_png_in_process(path, out_path):
+            return out_path
         tmp_tiff = join(out_dir, basename(base) + ".tiff")
         run(["JxrDecApp", "-i", path, "-o", tmp_tiff], check=True)
         _imagemagick_convert(tmp_tiff, out_path)
@@ -123,6 +452,8 @@ def ensure_raster_image(path: str, out_dir: str | None = None) -> str:
         raise RuntimeError("JPEG XR decode succeeded but PNG not found: " + out_path)
 
     if ext_lower in (".heic", ".heif"):
+        if _heif_to_png_in_process(path, out_path):
+            return out_path
         # Use libheif's CLI for robust conversion
         heif_convert = shutil.which("heif-convert") or "heif-convert"
         run([heif_convert, path, out_path], check=True)
@@ -130,25 +461,9 @@ def ensure_raster_image(path: str, out_dir: str | None = None) -> str:
             return out_path
         raise RuntimeError("heif-convert reported success but output file not found: " + out_path)
 
-    if ext_lower in (".pdf", ".eps", ".ps"):
+    if ext_lower in PAGE_EXTS:
         # Rasterize first page via Ghostscript
-        gs = shutil.which("gs") or "gs"
-        run(
-            [
-                gs,
-                "-dSAFER",
-                "-dBATCH",
-                "-dNOPAUSE",
-                "-sDEVICE=pngalpha",
-                "-dFirstPage=1",
-                "-dLastPage=1",
-                "-r200",
-                "-o",
-                out_path,
-                path,
-            ],
-            check=True,
-        )
+        _ghostscript_render(path, out_path, [1], _target_dpi(path, [1], max_size), threads)
         if isfile(out_path):
             return out_path
         raise RuntimeError("Ghostscript reported success but output file not found: " + out_path)
@@ -173,6 +488,30 @@ def main() -> None:
             "Directory to write converted PNGs. If omitted, converted files are written next to inputs."
         ),
     )
+    parser.add_argument(
+        "--pages",
+        default=None,
+        help=(
+            "Pages to render from PDF/EPS/PS inputs, e.g. '1-3,5' or 'all', written as "
+            "<name>-p<N>.png (default: first page only, written as <name>.png)"
+        ),
+    )
+    parser.add_argument("--max_width", type=int, default=None, help="Target width in pixels")
+    parser.add_argument(
+        "--max_height",
+        type=int,
+        default=None,
+        help=(
+            "Target height in pixels. With --max_width, PDF/EPS/PS pages are rendered at the "
+            f"resolution that fits this box instead of {DEFAULT_DPI} DPI."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of concurrent Inkscape shells for SVG/EMF/WMF inputs (default: usable CPUs).",
+    )
     args = parser.parse_args()
 
     if args.input_files:
@@ -189,10 +528,22 @@ def main() -> None:
             raise SystemExit("No files with supported extensions in input_dir")
 
     out_dir = expanduser(args.output_dir) if args.output_dir else None
+    max_size = None
+    if args.max_width and args.max_height:
+        max_size = (args.max_width, args.max_height)
+    elif args.max_width or args.max_height:
+        raise SystemExit("--max_width and --max_height must be given together")
+
     converted_paths = []
-    for p in paths:
-        if ensure_raster_image(p, out_dir) != p:
+    if args.pages:
+        pages = None if args.pages == "all" else args.pages
+        page_inputs = [p for p in paths if splitext(p)[1].lower() in PAGE_EXTS]
+        for p in page_inputs:
+            rasterize_pages(p, pages, out_dir, max_size)
             converted_paths.append(p)
+        paths = [p for p in paths if p not in page_inputs]
+    results = ensure_raster_images(paths, out_dir, args.jobs, max_size)
+    converted_paths += [p for p, r in zip(paths, results) if r != p]
 
     if converted_paths:
         print("Converted the following files to PNG:\n" + "\n".join(converted_paths))
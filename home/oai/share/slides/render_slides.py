@@ -1,28 +1,59 @@
 #!/usr/bin/env python3
 # Copyright (c) OpenAI. All rights reserved.
 import argparse
+import hashlib
+import json
 import os
+import posixpath
 import re
+import shutil
 import subprocess
 import tempfile
+import threading
+import time
 import xml.etree.ElementTree as ET
-from os import makedirs, replace
-from os.path import abspath, basename, exists, expanduser, join, splitext
-from typing import Sequence, cast
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from os import listdir, makedirs, replace
+from os.path import abspath, basename, exists, expanduser, isdir, join, splitext
+from typing import Any, Callable, Collection, Sequence, cast
 from zipfile import ZipFile
 
 from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
 
 EMU_PER_INCH: int = 914_400
+MANIFEST_NAME: str = ".render_manifest.json"
+REL_NS: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS: str = "http://schemas.openxmlformats.org/package/2006/relationships"
+SOFFICE_START_TIMEOUT_S: float = 60.0
+SOFFICE_CONVERT_TIMEOUT_S: float = 300.0
+# Upper bound on memory for full-page RGB buffers across concurrent pdftoppm processes.
+RASTER_MEMORY_BUDGET_BYTES: int = 2 << 30
+# Output format -> file extension. WebP is encoded with Pillow from an uncompressed PPM.
+IMAGE_EXTS: dict[str, str] = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+WEBP_QUALITY: int = 80
+PIL_FORMATS: dict[str, str] = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+# Bounding boxes of the named preview tiers; "full" uses --width/--height.
+TIER_BOXES: dict[str, tuple[int, int]] = {"thumbnail": (320, 180), "preview": (800, 450)}
+PPTX_EXTS: tuple[str, ...] = (".pptx", ".ppsx", ".potx", ".pptm", ".ppsm", ".potm")
+# Extensions picked up when a directory is given in batch mode.
+BATCH_EXTS: tuple[str, ...] = PPTX_EXTS + (".ppt", ".pps", ".odp", ".pdf")
+# Files per `soffice --convert-to` call in batch mode; rasterization of one chunk overlaps
+# the conversion of the next.
+CONVERT_BATCH_SIZE: int = 16
 
 
 def calc_dpi_via_ooxml(input_path: str, max_w_px: int, max_h_px: int) -> int:
     """Calculate DPI from OOXML `ppt/presentation.xml` slide size (cx/cy in EMUs)."""
-    with ZipFile(input_path, "r") as zf:
-        xml = zf.read("ppt/presentation.xml")
-    root = ET.fromstring(xml)
-    ns = {"p": "http://schemas.openxmlformats.org/presentationml/2006/main"}
-    sld_sz = root.find("p:sldSz", ns)
+    sld_sz_tag = "{http://schemas.openxmlformats.org/presentationml/2006/main}sldSz"
+    sld_sz = None
+    # p:sldSz sits near the top of the part; stop parsing as soon as it starts.
+    with ZipFile(input_path, "r") as zf, zf.open("ppt/presentation.xml") as f:
+        for _, elem in ET.iterparse(f, events=("start",)):
+            if elem.tag == sld_sz_tag:
+                sld_sz = elem
+                break
     if sld_sz is None:
         raise RuntimeError("Slide size not found in presentation.xml")
     cx = int(sld_sz.get("cx") or 0)
@@ -34,37 +65,82 @@ def calc_dpi_via_ooxml(input_path: str, max_w_px: int, max_h_px: int) -> int:
     return round(min(max_w_px / width_in, max_h_px / height_in))
 
 
-def calc_dpi_via_pdf(input_path: str, max_w_px: int, max_h_px: int) -> int:
+def pdf_page_size_in(info: dict) -> tuple[float, float]:
+    """Return the first page size in inches from `pdfinfo_from_path` output."""
+    size_val = info.get("Page size")
+    if not size_val:
+        for k, v in info.items():
+            if isinstance(v, str) and "size" in k.lower() and "pts" in v:
+                size_val = v
+                break
+    if not isinstance(size_val, str):
+        raise RuntimeError("Failed to read PDF page size for DPI computation.")
+
+    # e.g. "595.304 x 841.89 pts (A4)"
+    m = re.search(r"(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*pts", size_val)
+    if not m:
+        raise RuntimeError("Unrecognized PDF page size format.")
+    width_pts = float(m.group(1))
+    height_pts = float(m.group(2))
+    width_in = width_pts / 72.0
+    height_in = height_pts / 72.0
+    if width_in <= 0 or height_in <= 0:
+        raise RuntimeError("Invalid PDF page size values.")
+    return width_in, height_in
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def calc_dpi_from_pdf(pdf_path: str, max_w_px: int, max_h_px: int) -> int:
+    """Compute DPI from the first page size of an existing PDF."""
+    width_in, height_in = pdf_page_size_in(pdfinfo_from_path(pdf_path))
+    return round(min(max_w_px / width_in, max_h_px / height_in))
+
+
+def choose_dpi(input_path: str, pdf_path: str, max_w_px: int, max_h_px: int) -> int:
+    """DPI for input_path: from the OOXML slide size for PPTX-family files, else from the PDF."""
+    if input_path.lower().endswith(PPTX_EXTS):
+        return calc_dpi_via_ooxml(input_path, max_w_px, max_h_px)
+    return calc_dpi_from_pdf(pdf_path, max_w_px, max_h_px)
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def usable_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def plan_thread_count(
+    page_count: int,
+    page_size_in: tuple[float, float],
+    dpi: int,
+    jobs: int | None = None,
+    memory_budget: int = RASTER_MEMORY_BUDGET_BYTES,
+) -> int:
+    """Return how many pdftoppm processes to run for `page_count` pages.
+
+    convert_from_path splits the page range evenly across `thread_count` processes, each
+    holding one page bitmap at a time. The count is bounded by `jobs` (default: usable
+    CPUs), the page count, and how many page bitmaps at `dpi` fit in `memory_budget`.
+    """
+    if jobs is None:
+        jobs = usable_cpus()
+    page_bytes = max(1, round(page_size_in[0] * dpi) * round(page_size_in[1] * dpi) * 3)
+    return max(1, min(jobs or 1, page_count, memory_budget // page_bytes))
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def calc_dpi_via_pdf(
+    input_path: str, max_w_px: int, max_h_px: int, pool: "SofficePool | None" = None
+) -> int:
     """Convert input to PDF and compute DPI from its page size."""
-    with tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile:
-        with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
-            stem = splitext(basename(input_path))[0]
-            pdf_path = convert_to_pdf(input_path, user_profile, convert_tmp_dir, stem)
-            if not (pdf_path and exists(pdf_path)):
-                raise RuntimeError("Failed to convert input to PDF for DPI computation.")
-
-            info = pdfinfo_from_path(pdf_path)
-            size_val = info.get("Page size")
-            if not size_val:
-                for k, v in info.items():
-                    if isinstance(v, str) and "size" in k.lower() and "pts" in v:
-                        size_val = v
-                        break
-            if not isinstance(size_val, str):
-                raise RuntimeError("Failed to read PDF page size for DPI computation.")
-
-            m = re.search(r"(\d+)\s*x\s*(\d+)\s*pts", size_val)
-            if not m:
-                raise RuntimeError("Unrecognized PDF page size format.")
-            width_pts = int(m.group(1))
-            height_pts = int(m.group(2))
-            width_in = width_pts / 72.0
-            height_in = height_pts / 72.0
-            if width_in <= 0 or height_in <= 0:
-                raise RuntimeError("Invalid PDF page size values.")
-            return round(min(max_w_px / width_in, max_h_px / height_in))
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(input_path, convert_tmp_dir, pool)
+        return calc_dpi_from_pdf(pdf_path, max_w_px, max_h_px)
 
 
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
 def run_cmd_no_check(cmd: list[str]) -> None:
     subprocess.run(
         cmd,
@@ -75,6 +151,7 @@ def run_cmd_no_check(cmd: list[str]) -> None:
     )
 
 
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
 def convert_to_pdf(
     pptx_path: str,
     user_profile: str,
@@ -140,65 +217,712 @@ def convert_to_pdf(
     return ""
 
 
-def rasterize(
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def convert_batch_to_pdf(
+    pptx_paths: Sequence[str], user_profile: str, convert_tmp_dir: str
+) -> dict[str, str]:
+    """Convert many inputs with one soffice call per group and map each input to its PDF.
+
+    LibreOffice names each output after the input's stem, so inputs sharing a stem go to
+    separate groups, each with its own output directory. Inputs without a PDF afterwards are
+    retried alone through convert_to_pdf() and its ODP fallback; "" marks a failure.
+    """
+    groups: list[dict[str, str]] = []
+    for pptx_path in pptx_paths:
+        stem = splitext(basename(pptx_path))[0]
+        group = next((g for g in groups if stem not in g), None)
+        if group is None:
+            group = {}
+            groups.append(group)
+        group[stem] = pptx_path
+    pdf_paths: dict[str, str] = {}
+    for i, group in enumerate(groups):
+        group_dir = join(convert_tmp_dir, f"batch-{i}")
+        makedirs(group_dir, exist_ok=True)
+        cmd_pdf = [
+            "soffice",
+            "-env:UserInstallation=file://" + user_profile,
+            "--invisible",
+            "--headless",
+            "--norestore",
+            "--convert-to",
+            "pdf",
+            "--outdir",
+            group_dir,
+            *group.values(),
+        ]
+        run_cmd_no_check(cmd_pdf)
+        for stem, pptx_path in group.items():
+            pdf_path = join(group_dir, f"{stem}.pdf")
+            if not exists(pdf_path):
+                pdf_path = convert_to_pdf(pptx_path, user_profile, group_dir, stem)
+            pdf_paths[pptx_path] = pdf_path
+    return pdf_paths
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def _import_uno() -> Any:
+    """Import LibreOffice's Python bindings, which only SofficeWorker needs.
+
+    Importing uno bootstraps pyuno and installs a global import hook, so it is not done at
+    module import time.
+    """
+    try:
+        import uno  # type: ignore
+    except ImportError:
+        raise RuntimeError("LibreOffice Python bindings (uno) are not available.") from None
+    return uno
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def _uno_props(uno: Any, **kwargs: Any) -> tuple:
+    props = []
+    for name, value in kwargs.items():
+        prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+class SofficeWorker:
+    """A long-lived headless soffice instance with its own user profile, driven over UNO."""
+
+    def __init__(self, convert_timeout: float = SOFFICE_CONVERT_TIMEOUT_S) -> None:
+        self.uno = _import_uno()
+        self.convert_timeout = convert_timeout
+        self.user_profile = tempfile.mkdtemp(prefix="soffice_profile_")
+        self.pipe_name = "render_" + basename(self.user_profile)
+        self.proc: subprocess.Popen | None = None
+        self.desktop: Any = None
+        # Set once a restart fails; a dead worker refuses further conversions.
+        self.dead = False
+        try:
+            self.start()
+        except Exception:
+            self.close()
+            raise
+
+    def start(self) -> None:
+        self.proc = subprocess.Popen(
+            [
+                "soffice",
+                "-env:UserInstallation=file://" + self.user_profile,
+                "--invisible",
+                "--headless",
+                "--norestore",
+                "--nologo",
+                "--nodefault",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=os.environ.copy(),
+        )
+        local_ctx = self.uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        deadline = time.monotonic() + SOFFICE_START_TIMEOUT_S
+        while True:
+            try:
+                ctx = resolver.resolve(
+                    f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+                )
+                self.desktop = ctx.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.frame.Desktop", ctx
+                )
+                return
+            except Exception:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("soffice worker failed to start.")
+                time.sleep(0.2)
+
+    def stop(self) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+        self.desktop = None
+
+    def close(self) -> None:
+        self.stop()
+        shutil.rmtree(self.user_profile, ignore_errors=True)
+
+    def is_healthy(self) -> bool:
+        if self.proc is None or self.proc.poll() is not None:
+            return False
+        try:
+            self.desktop.getFrames()
+            return True
+        except Exception:
+            return False
+
+    def _call(self, fn: Callable[[], None]) -> bool:
+        """Run a UNO call with a timeout and restart the instance if it hangs or dies.
+
+        If the restart fails too, the worker is marked dead and this and later calls fail.
+        """
+        if self.dead:
+            return False
+        result: dict[str, bool] = {}
+
+        def target() -> None:
+            try:
+                fn()
+                result["ok"] = True
+            except Exception:
+                result["ok"] = False
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(self.convert_timeout)
+        if thread.is_alive() or not self.is_healthy():
+            self.stop()
+            try:
+                self.start()
+            except Exception:
+                self.dead = True
+            return False
+        return result.get("ok", False)
+
+    def _export(self, src_path: str, dst_path: str, filter_name: str) -> bool:
+        def export() -> None:
+            doc = self.desktop.loadComponentFromURL(
+                self.uno.systemPathToFileUrl(src_path),
+                "_blank",
+                0,
+                _uno_props(self.uno, Hidden=True),
+            )
+            if doc is None:
+                raise RuntimeError("soffice could not load " + src_path)
+            try:
+                doc.storeToURL(
+                    self.uno.systemPathToFileUrl(dst_path),
+                    _uno_props(self.uno, FilterName=filter_name),
+                )
+            finally:
+                doc.close(True)
+
+        return self._call(export) and exists(dst_path)
+
+    def convert_to_pdf(self, pptx_path: str, convert_tmp_dir: str, stem: str) -> str:
+        # Same strategy as convert_to_pdf: direct export, then via ODP.
+        pdf_path = join(convert_tmp_dir, f"{stem}.pdf")
+        if self._export(pptx_path, pdf_path, "impress_pdf_Export"):
+            return pdf_path
+        odp_path = join(convert_tmp_dir, f"{stem}.odp")
+        if self._export(pptx_path, odp_path, "impress8"):
+            if self._export(odp_path, pdf_path, "impress_pdf_Export"):
+                return pdf_path
+        return ""
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+class SofficePool:
+    """A pool of SofficeWorkers; each conversion is dispatched to an idle worker.
+
+    Use it for many conversions in one process to pay soffice startup once per worker.
+    Workers that die are dropped; once none is left, conversions fail (return "").
+    """
+
+    def __init__(self, size: int, convert_timeout: float = SOFFICE_CONVERT_TIMEOUT_S) -> None:
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self._cond = threading.Condition()
+        self._idle: list[SofficeWorker] = []
+        self._live = 0
+        self._workers: list[SofficeWorker] = []
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            futures = [executor.submit(SofficeWorker, convert_timeout) for _ in range(size)]
+        errors = []
+        for future in futures:
+            try:
+                self._workers.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            # Every worker that did start is shut down, not just those before the failure.
+            self.close()
+            raise errors[0]
+        self._idle = list(self._workers)
+        self._live = len(self._workers)
+
+    def convert_to_pdf(self, pptx_path: str, convert_tmp_dir: str, stem: str) -> str:
+        with self._cond:
+            self._cond.wait_for(lambda: self._idle or not self._live)
+            if not self._idle:
+                return ""
+            worker = self._idle.pop()
+        try:
+            return worker.convert_to_pdf(pptx_path, convert_tmp_dir, stem)
+        finally:
+            with self._cond:
+                if worker.dead:
+                    self._live -= 1
+                else:
+                    self._idle.append(worker)
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+
+    def __enter__(self) -> "SofficePool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def produce_pdf(
     pptx_path: str,
+    convert_tmp_dir: str,
+    pool: SofficePool | None = None,
+    cache_dir: str | None = None,
+) -> str:
+    """Convert the input to PDF once and return the PDF path.
+
+    PDF inputs are returned as-is. With `cache_dir`, PDFs are kept under the SHA-256 of the
+    input bytes, so re-rendering an unchanged input skips LibreOffice entirely; the returned
+    path then points into the cache.
+    """
+    pptx_path = abspath(pptx_path)
+    if pptx_path.lower().endswith(".pdf"):
+        # Already a PDF: rasterize it directly.
+        return pptx_path
+    stem = splitext(basename(pptx_path))[0]
+    cached_pdf = ""
+    if cache_dir:
+        cached_pdf = join(cache_dir, f"slides-{file_digest(pptx_path)}.pdf")
+        if exists(cached_pdf):
+            return cached_pdf
+
+    if pool is not None:
+        pdf_path = pool.convert_to_pdf(pptx_path, convert_tmp_dir, stem)
+    else:
+        # Use a unique user profile to avoid LibreOffice profile lock when running concurrently
+        with tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile:
+            pdf_path = convert_to_pdf(pptx_path, user_profile, convert_tmp_dir, stem)
+    if not pdf_path or not exists(pdf_path):
+        raise RuntimeError("Failed to produce PDF for rasterization (direct and ODP fallback).")
+
+    if cached_pdf:
+        store_cached_pdf(pdf_path, cached_pdf)
+    return pdf_path
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def store_cached_pdf(pdf_path: str, cached_pdf: str) -> None:
+    makedirs(os.path.dirname(cached_pdf), exist_ok=True)
+    # Copy then rename so concurrent renders never read a partial PDF.
+    tmp_pdf = f"{cached_pdf}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(pdf_path, tmp_pdf)
+    replace(tmp_pdf, cached_pdf)
+
+
+def _part_rels(zf: ZipFile, part: str) -> list[tuple[str, str]]:
+    """Return (relationship type suffix, target part name) for the internal rels of `part`."""
+    part_dir, name = posixpath.split(part)
+    rels_name = posixpath.join(part_dir, "_rels", name + ".rels")
+    try:
+        root = ET.fromstring(zf.read(rels_name))
+    except KeyError:
+        return []
+    rels = []
+    for rel in root.findall(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target") or ""
+        if target.startswith("/"):
+            target_part = target.lstrip("/")
+        else:
+            target_part = posixpath.normpath(posixpath.join(part_dir, target))
+        rels.append(((rel.get("Type") or "").rsplit("/", 1)[-1], target_part))
+    return rels
+
+
+def _hash_parts(zf: ZipFile, roots: list[str], skip_types: set[str]) -> str:
+    """Hash `roots`, their rels and every part reachable from them, except `skip_types`."""
+    h = hashlib.sha256()
+    seen: set[str] = set()
+    stack = list(roots)
+    while stack:
+        part = stack.pop()
+        if part in seen:
+            continue
+        seen.add(part)
+        h.update(part.encode())
+        try:
+            h.update(zf.read(part))
+        except KeyError:
+            continue
+        # The rels file itself is hashed through the target names it contributes.
+        for rel_type, target in _part_rels(zf, part):
+            h.update(f"{rel_type}>{target}".encode())
+            if rel_type not in skip_types:
+                stack.append(target)
+    return h.hexdigest()
+
+
+def slide_hashes(pptx_path: str) -> tuple[str, list[str]]:
+    """Return a hash of the parts shared by all slides and one hash per rendered slide.
+
+    Slide hashes cover the slide XML and the media, charts etc. it references; layouts,
+    masters and themes go into the shared hash. Hidden slides are skipped because they do
+    not produce PDF pages.
+    """
+    with ZipFile(pptx_path, "r") as zf:
+        pres = "ppt/presentation.xml"
+        pres_rels = dict((t, rel_type) for rel_type, t in _part_rels(zf, pres))
+        shared = _hash_parts(
+            zf,
+            [pres] + [t for t, rel_type in pres_rels.items() if rel_type == "slideMaster"],
+            {"slide", "notesMaster", "handoutMaster", "presProps", "viewProps"},
+        )
+        root = ET.fromstring(zf.read(pres))
+        ns = {"p": "http://schemas.openxmlformats.org/presentationml/2006/main"}
+        targets = {
+            rel.get("Id"): rel.get("Target")
+            for rel in ET.fromstring(zf.read("ppt/_rels/presentation.xml.rels"))
+        }
+        hashes = []
+        for sld_id in root.findall("p:sldIdLst/p:sldId", ns):
+            target = targets.get(sld_id.get(f"{{{REL_NS}}}id"))
+            if not target:
+                continue
+            slide_part = posixpath.normpath(posixpath.join("ppt", target))
+            slide_root = ET.fromstring(zf.read(slide_part))
+            if slide_root.get("show") in ("0", "false"):
+                continue
+            hashes.append(_hash_parts(zf, [slide_part], {"slideLayout", "notesSlide"}))
+    return shared, hashes
+
+
+def plan_incremental(
+    out_dir: str, shared: str, hashes: list[str], dpi: int, fmt: str = "png"
+) -> list[int]:
+    """Return the 1-based pages whose image in out_dir is missing or out of date."""
+    manifest_path = join(out_dir, MANIFEST_NAME)
+    old: dict = {}
+    if exists(manifest_path):
+        try:
+            with open(manifest_path) as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            old = {}
+    old_hashes = old.get("slides", [])
+    full = (
+        old.get("shared") != shared
+        or old.get("dpi") != dpi
+        or old.get("format", "png") != fmt
+    )
+    return [
+        page
+        for page, h in enumerate(hashes, start=1)
+        if full
+        or page > len(old_hashes)
+        or old_hashes[page - 1] != h
+        or not exists(join(out_dir, f"slide-{page}.{IMAGE_EXTS[fmt]}"))
+    ]
+
+
+def write_manifest(
+    out_dir: str, shared: str, hashes: list[str], dpi: int, fmt: str = "png"
+) -> None:
+    # Drop images of slides that no longer exist.
+    page = len(hashes) + 1
+    while exists(join(out_dir, f"slide-{page}.{IMAGE_EXTS[fmt]}")):
+        os.remove(join(out_dir, f"slide-{page}.{IMAGE_EXTS[fmt]}"))
+        page += 1
+    with open(join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump({"shared": shared, "dpi": dpi, "format": fmt, "slides": hashes}, f)
+
+
+def _page_runs(pages: Sequence[int]) -> list[tuple[int, int]]:
+    """Group sorted 1-based pages into inclusive (first, last) runs."""
+    runs: list[tuple[int, int]] = []
+    for page in sorted(set(pages)):
+        if runs and runs[-1][1] == page - 1:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+    return runs
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def _encode_webp(src_path: str, dst_path: str) -> None:
+    with Image.open(src_path) as img:
+        img.save(dst_path, "WEBP", quality=WEBP_QUALITY)
+    os.remove(src_path)
+
+
+def rasterize_pdf(
+    pdf_path: str,
     out_dir: str,
     dpi: int,
+    pages: Sequence[int] | None = None,
+    jobs: int | None = None,
+    fmt: str = "png",
 ) -> Sequence[str]:
-    """Rasterise PPTX to PNG files placed in out_dir and return the image paths."""
+    """Rasterise an existing PDF to slide-<N>.<ext> files in out_dir and return their paths.
+
+    If `pages` (1-based) is given, only those pages are rasterised. `jobs` caps the number of
+    concurrent pdftoppm processes (see plan_thread_count). `fmt` is a key of IMAGE_EXTS.
+    """
     makedirs(out_dir, exist_ok=True)
-    pptx_path = abspath(pptx_path)
-    stem = splitext(basename(pptx_path))[0]
+    info = pdfinfo_from_path(pdf_path)
+    page_size_in = pdf_page_size_in(info)
+    runs = [(1, int(info["Pages"]))]
+    if pages is not None:
+        runs = _page_runs(pages)
+    slides: dict[int, str] = {}
+    for first_page, last_page in runs:
+        thread_count = plan_thread_count(last_page - first_page + 1, page_size_in, dpi, jobs)
+        paths_raw = cast(
+            list[str],
+            convert_from_path(
+                pdf_path,
+                dpi=dpi,
+                fmt="ppm" if fmt == "webp" else fmt,
+                thread_count=thread_count,
+                first_page=first_page,
+                last_page=last_page,
+                output_folder=out_dir,
+                paths_only=True,
+                output_file="slide",
+            ),
+        )
+        # Rename convert_from_path's output format f'slide{thread_id:04d}-{page_num:02d}.<ext>'.
+        # Renaming after each run keeps the next run's listing of out_dir free of raw names.
+        for src_path in paths_raw:
+            base = splitext(basename(src_path))[0]
+            slide_num_str = base.split("-")[-1]
+            slide_num = int(slide_num_str)
+            dst_path = join(out_dir, f"slide-{slide_num}.{IMAGE_EXTS[fmt]}")
+            if fmt == "webp":
+                _encode_webp(src_path, dst_path)
+            else:
+                replace(src_path, dst_path)
+            slides[slide_num] = dst_path
+    if pages is not None:
+        slides = {num: path for num, path in slides.items() if num in pages}
+    final_paths = [slides[num] for num in sorted(slides)]
+    return final_paths
 
-    # Use a unique user profile to avoid LibreOffice profile lock when running concurrently
-    with tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile:
-        # Write conversion outputs into a temp directory to avoid any IO oddities
-        with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
-            pdf_path = convert_to_pdf(
-                pptx_path,
-                user_profile,
-                convert_tmp_dir,
-                stem,
-            )
 
-            if not pdf_path or not exists(pdf_path):
-                raise RuntimeError(
-                    "Failed to produce PDF for rasterization (direct and ODP fallback)."
-                )
+def rasterize_pdf_images(pdf_path: str, dpi: int, jobs: int | None = None) -> list[Image.Image]:
+    """Rasterise every page of an existing PDF into in-memory PIL images, in page order."""
+    info = pdfinfo_from_path(pdf_path)
+    page_count = int(info["Pages"])
+    thread_count = plan_thread_count(page_count, pdf_page_size_in(info), dpi, jobs)
+    return convert_from_path(pdf_path, dpi=dpi, thread_count=thread_count)
+
+
+def write_images(images: Sequence[Image.Image], out_dir: str, fmt: str = "png") -> list[str]:
+    """Save images as slide-<N>.<ext> files in out_dir and return their paths."""
+    makedirs(out_dir, exist_ok=True)
+    paths = []
+    for num, img in enumerate(images, start=1):
+        path = join(out_dir, f"slide-{num}.{IMAGE_EXTS[fmt]}")
+        save_kwargs = {"quality": WEBP_QUALITY} if fmt == "webp" else {}
+        img.save(path, PIL_FORMATS[fmt], **save_kwargs)
+        paths.append(path)
+    return paths
+
+
+def slide_image_paths(out_dir: str, count: int, fmt: str = "png") -> list[str]:
+    ext = IMAGE_EXTS[fmt]
+    return [join(out_dir, f"slide-{n}.{ext}") for n in range(1, count + 1)]
+
+
+def downsample_tiers(
+    src_paths: Sequence[str],
+    tier_dirs: Sequence[tuple[str, tuple[int, int]]],
+    fmt: str = "png",
+    refresh: Collection[str] | None = None,
+) -> None:
+    """Write smaller copies of the images in src_paths into each tier directory.
+
+    `tier_dirs` lists (directory, (max_w, max_h)) from largest to smallest; every tier is
+    scaled from the previous one so each source image is decoded only once. With `refresh`,
+    only images in it or missing from a tier are written.
+    """
+    for tier_dir, _ in tier_dirs:
+        makedirs(tier_dir, exist_ok=True)
+    for src_path in src_paths:
+        name = basename(src_path)
+        todo = [
+            (tier_dir, box)
+            for tier_dir, box in tier_dirs
+            if refresh is None or src_path in refresh or not exists(join(tier_dir, name))
+        ]
+        if not todo:
+            continue
+        with Image.open(src_path) as img:
+            img.load()
+            for tier_dir, box in tier_dirs:
+                img.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+                if (tier_dir, box) in todo:
+                    save_kwargs = {"quality": WEBP_QUALITY} if fmt == "webp" else {}
+                    img.save(join(tier_dir, name), PIL_FORMATS[fmt], **save_kwargs)
+
+
+def rasterize(
+    pptx_path: str,
+    out_dir: str,
+    dpi: int,
+    pool: SofficePool | None = None,
+    cache_dir: str | None = None,
+    jobs: int | None = None,
+    fmt: str = "png",
+) -> Sequence[str]:
+    """Rasterise PPTX to image files placed in out_dir and return the image paths.
+
+    If `pool` is given, the PDF conversion runs on one of its soffice instances.
+    """
+    # Write conversion outputs into a temp directory to avoid any IO oddities
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(pptx_path, convert_tmp_dir, pool, cache_dir)
+        # Perform rasterization while the temp PDF still exists
+        return rasterize_pdf(pdf_path, out_dir, dpi, jobs=jobs, fmt=fmt)
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def render_batch(
+    input_paths: Sequence[str],
+    out_dirs: Sequence[str],
+    width: int,
+    height: int,
+    fmt: str = "png",
+    jobs: int | None = None,
+    cache_dir: str | None = None,
+    soffice_workers: int = 0,
+) -> list[dict[str, Any]]:
+    """Render many inputs, sharing soffice calls and rasterising on a worker pool.
+
+    Inputs are converted CONVERT_BATCH_SIZE at a time with one LibreOffice profile, or with
+    `soffice_workers` > 0 through a SofficePool of that many persistent UNO instances. Each PDF
+    is rasterised by one of `jobs` workers (one pdftoppm each) while the next chunk converts.
+    Returns one summary per input, in order, with timings in seconds and an "error" string
+    for failures. Conversion time is the chunk's soffice time split evenly across its files.
+    """
+    summaries: list[dict[str, Any]] = [
+        {
+            "input": path,
+            "output_dir": out_dir,
+            "pages": 0,
+            "convert_s": 0.0,
+            "rasterize_s": 0.0,
+            "error": None,
+        }
+        for path, out_dir in zip(input_paths, out_dirs)
+    ]
 
-            # Perform rasterization while the temp PDF still exists
-            paths_raw = cast(
-                list[str],
-                convert_from_path(
-                    pdf_path,
-                    dpi=dpi,
-                    fmt="png",
-                    thread_count=8,
-                    output_folder=out_dir,
-                    paths_only=True,
-                    output_file="slide",
+    def rasterize_one(i: int, pdf_path: str) -> None:
+        start = time.perf_counter()
+        try:
+            dpi = choose_dpi(input_paths[i], pdf_path, width, height)
+            paths = rasterize_pdf(pdf_path, out_dirs[i], dpi, jobs=1, fmt=fmt)
+            summaries[i]["pages"] = len(paths)
+        except Exception as e:
+            summaries[i]["error"] = f"{type(e).__name__}: {e}"
+        summaries[i]["rasterize_s"] = round(time.perf_counter() - start, 3)
+
+    def convert_chunk(paths: list[str], chunk_dir: str) -> dict[str, str]:
+        if pool is None:
+            return convert_batch_to_pdf(paths, user_profile, chunk_dir)
+        makedirs(chunk_dir, exist_ok=True)
+        # Pool workers export one file each; the index keeps same-named inputs apart.
+        with ThreadPoolExecutor(max_workers=soffice_workers) as converters:
+            pdfs = converters.map(
+                lambda k: pool.convert_to_pdf(
+                    paths[k], chunk_dir, f"{k}-{splitext(basename(paths[k]))[0]}"
                 ),
+                range(len(paths)),
             )
-    # Rename convert_from_path's output format f'slide{thread_id:04d}-{page_num:02d}.png'
-    slides = []
-    for src_path in paths_raw:
-        base = splitext(basename(src_path))[0]
-        slide_num_str = base.split("-")[-1]
-        slide_num = int(slide_num_str)
-        dst_path = join(out_dir, f"slide-{slide_num}.png")
-        replace(src_path, dst_path)
-        slides.append((slide_num, dst_path))
-    slides.sort(key=lambda t: t[0])
-    final_paths = [path for _, path in slides]
-    return final_paths
+            return dict(zip(paths, pdfs))
+
+    with (
+        tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile,
+        tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir,
+        SofficePool(soffice_workers) if soffice_workers > 0 else nullcontext() as pool,
+        ThreadPoolExecutor(max_workers=max(1, jobs or usable_cpus())) as executor,
+    ):
+        futures = []
+        for chunk_start in range(0, len(input_paths), CONVERT_BATCH_SIZE):
+            chunk = range(chunk_start, min(chunk_start + CONVERT_BATCH_SIZE, len(input_paths)))
+            pdf_paths: dict[int, str] = {}
+            cached_pdfs: dict[int, str] = {}
+            for i in chunk:
+                path = input_paths[i]
+                if not exists(path):
+                    summaries[i]["error"] = "Input file not found"
+                elif path.lower().endswith(".pdf"):
+                    pdf_paths[i] = path
+                elif cache_dir:
+                    cached_pdfs[i] = join(cache_dir, f"slides-{file_digest(path)}.pdf")
+                    if exists(cached_pdfs[i]):
+                        pdf_paths[i] = cached_pdfs.pop(i)
+            todo = [i for i in chunk if i not in pdf_paths and summaries[i]["error"] is None]
+            if todo:
+                start = time.perf_counter()
+                converted = convert_chunk(
+                    [input_paths[i] for i in todo], join(convert_tmp_dir, f"chunk-{chunk_start}")
+                )
+                convert_s = round((time.perf_counter() - start) / len(todo), 3)
+                for i in todo:
+                    summaries[i]["convert_s"] = convert_s
+                    pdf_path = converted[input_paths[i]]
+                    if not pdf_path or not exists(pdf_path):
+                        summaries[i]["error"] = "Failed to produce PDF for rasterization."
+                        continue
+                    if i in cached_pdfs:
+                        store_cached_pdf(pdf_path, cached_pdfs[i])
+                    pdf_paths[i] = pdf_path
+            futures += [executor.submit(rasterize_one, i, p) for i, p in pdf_paths.items()]
+        for future in futures:
+            future.result()
+    return summaries
+
+
+# Mirrored in home/oai/skills/docs/render_docx.py; keep both copies in sync.
+def batch_output_dirs(input_paths: Sequence[str], output_root: str | None) -> list[str]:
+    """One output directory per input: <output_root>/<stem>, or next to the input without a
+    root. Colliding names get a numeric suffix."""
+    out_dirs: list[str] = []
+    for path in input_paths:
+        base = join(output_root, splitext(basename(path))[0]) if output_root else splitext(path)[0]
+        out_dir, n = base, 2
+        while out_dir in out_dirs:
+            out_dir, n = f"{base}-{n}", n + 1
+        out_dirs.append(out_dir)
+    return out_dirs
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Render PowerPoint file to PNG images.")
+    parser = argparse.ArgumentParser(description="Render PowerPoint file to images.")
     parser.add_argument(
         "input_path",
         type=str,
-        help="Path to the input PowerPoint file.",
+        nargs="+",
+        help=(
+            "Path to the input PowerPoint file. Several files or a directory render in batch "
+            "mode: shared soffice calls, pooled rasterisation and a JSON summary on stdout."
+        ),
     )
     parser.add_argument(
         "--output_dir",
@@ -227,15 +951,139 @@ def main() -> None:
             "The actual value may exceed slightly."
         ),
     )
+    parser.add_argument(
+        "--tiers",
+        type=str,
+        default=None,
+        help=(
+            "Comma-separated output tiers among thumbnail (320x180), preview (800x450) and full "
+            "(--width x --height), each written to its own subdirectory. The PDF is rasterised "
+            "once at the largest requested tier and the rest are downsampled in memory, so "
+            "'--tiers thumbnail' rasterises directly at thumbnail DPI."
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help=(
+            "Only re-render slides whose XML or referenced media changed since the last render "
+            "into the same output directory (PPTX-family inputs only)."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(IMAGE_EXTS),
+        default="png",
+        help="Output image format (default: png). JPEG and WebP are smaller for previews.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help=(
+            "Maximum number of concurrent rasterization processes. Defaults to the number of "
+            "usable CPUs, further limited by page count and a memory budget."
+        ),
+    )
+    parser.add_argument(
+        "--soffice_workers",
+        type=int,
+        default=0,
+        help=(
+            "Batch mode only: convert through this many persistent LibreOffice instances driven "
+            "over UNO (needs LibreOffice's Python bindings) instead of batched soffice calls."
+        ),
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help=(
+            "Directory for a PDF cache keyed by the input's content hash. Re-rendering an "
+            "unchanged file then skips LibreOffice."
+        ),
+    )
     args = parser.parse_args()
 
-    input_path = abspath(expanduser(args.input_path))
+    input_paths: list[str] = []
+    batch = len(args.input_path) > 1
+    for raw_path in args.input_path:
+        path = abspath(expanduser(raw_path))
+        if isdir(path):
+            names = sorted(n for n in listdir(path) if n.lower().endswith(BATCH_EXTS))
+            input_paths += [join(path, n) for n in names if not n.startswith(".~lock")]
+            batch = True
+        else:
+            input_paths.append(path)
+    if batch:
+        if args.tiers or args.incremental:
+            parser.error("--tiers and --incremental need a single input file")
+        output_root = abspath(expanduser(args.output_dir)) if args.output_dir else None
+        start = time.perf_counter()
+        summaries = render_batch(
+            input_paths,
+            batch_output_dirs(input_paths, output_root),
+            args.width,
+            args.height,
+            fmt=args.format,
+            jobs=args.jobs,
+            cache_dir=abspath(expanduser(args.cache_dir)) if args.cache_dir else None,
+            soffice_workers=args.soffice_workers,
+        )
+        failed = sum(1 for summary in summaries if summary["error"])
+        elapsed_s = round(time.perf_counter() - start, 3)
+        print(json.dumps({"files": summaries, "failed": failed, "elapsed_s": elapsed_s}, indent=2))
+        if failed:
+            raise SystemExit(1)
+        return
+
+    if args.soffice_workers:
+        parser.error("--soffice_workers needs several input files or a directory")
+    input_path = input_paths[0]
     out_dir = abspath(expanduser(args.output_dir)) if args.output_dir else splitext(input_path)[0]
-    if input_path.lower().endswith((".pptx", ".ppsx", ".potx", ".pptm", ".ppsm", ".potm")):
-        dpi = calc_dpi_via_ooxml(input_path, args.width, args.height)
-    else:
-        dpi = calc_dpi_via_pdf(input_path, args.width, args.height)
-    rasterize(input_path, out_dir, dpi)
+    # Without --tiers, the full size is written straight into out_dir.
+    tiers = [(out_dir, (args.width, args.height))]
+    if args.tiers:
+        boxes = dict(TIER_BOXES, full=(args.width, args.height))
+        names = [name.strip() for name in args.tiers.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(boxes))
+        if not names or unknown:
+            parser.error("--tiers must list thumbnail, preview and/or full")
+        tiers = [(join(out_dir, name), boxes[name]) for name in dict.fromkeys(names)]
+        tiers.sort(key=lambda t: t[1][0] * t[1][1], reverse=True)
+    render_dir, (width, height) = tiers[0]
+    cache_dir = abspath(expanduser(args.cache_dir)) if args.cache_dir else None
+    is_ooxml = input_path.lower().endswith(PPTX_EXTS)
+    pages: list[int] | None = None
+    if is_ooxml:
+        dpi = calc_dpi_via_ooxml(input_path, width, height)
+        if args.incremental:
+            shared, hashes = slide_hashes(input_path)
+            pages = plan_incremental(render_dir, shared, hashes, dpi, args.format)
+            if not pages:
+                write_manifest(render_dir, shared, hashes, dpi, args.format)
+                if len(tiers) > 1:
+                    # Nothing to re-render, but tiers added since the last run still get filled.
+                    src_paths = slide_image_paths(render_dir, len(hashes), args.format)
+                    downsample_tiers(src_paths, tiers[1:], args.format, refresh=())
+                print("Slides unchanged in " + out_dir)
+                return
+    # The PDF is produced once and shared by the DPI computation and rasterization.
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(input_path, convert_tmp_dir, cache_dir=cache_dir)
+        if not is_ooxml:
+            dpi = calc_dpi_from_pdf(pdf_path, width, height)
+        paths = rasterize_pdf(pdf_path, render_dir, dpi, pages, jobs=args.jobs, fmt=args.format)
+    if len(tiers) > 1:
+        src_paths, refresh = paths, None
+        if pages is not None:
+            src_paths = slide_image_paths(render_dir, len(hashes), args.format)
+            refresh = set(paths)
+        downsample_tiers(src_paths, tiers[1:], args.format, refresh)
+    if pages is not None:
+        write_manifest(render_dir, shared, hashes, dpi, args.format)
+        print(f"Re-rendered {len(pages)} slide(s): " + ", ".join(map(str, pages)))
     print("Slides rendered to " + out_dir)
 
 
@@ -1,24 +1,58 @@
 #!/usr/bin/env python3
 # Copyright (c) OpenAI. All rights reserved.
 import argparse
+import io
+import json
+import math
+import re
+import shutil
 import tempfile
-from os.path import abspath, expanduser, join
-from typing import Sequence, cast
+from concurrent.futures import ProcessPoolExecutor
+from os import listdir, makedirs, remove
+from os.path import abspath, basename, expanduser, isdir, join, splitext
+from typing import Any, Callable, Iterator, Literal, Sequence, cast
 
 import numpy as np
 
 # Always run this script in the current directory.
 import render_slides  # type: ignore
-from PIL import Image
+from PIL import Image, ImageDraw
 from pptx import Presentation
 from pptx.dml.color import RGBColor
-from pptx.enum.shapes import MSO_AUTO_SHAPE_TYPE
+from pptx.enum.shapes import MSO_AUTO_SHAPE_TYPE, MSO_SHAPE_TYPE
+from pptx.oxml.ns import qn
+from pptx.shapes.base import BaseShape
 from pptx.util import Emu
 
 # Configuration specific to overflow checking
 PAD_PX: int = 100  # fixed padding on every side in pixels
 PAD_RGB = (200, 200, 200)
+# Context kept around the out-of-canvas pixels in overlay crops.
+OVERLAY_CONTEXT_PX: int = 40
 EMU_PER_INCH: int = 914_400
+# Shapes reaching past the canvas by at most this much (1 pt) are left to the pixel check.
+STATIC_SLACK_EMU: int = 12_700
+# Files this tool writes into --output_dir; nothing else there is ever removed.
+OUTPUT_NAME_RE = re.compile(r"slide-\d+(?:-overflow)?\.png")
+
+# Blip effects that can make a picture (partly) transparent.
+BLIP_ALPHA_TAGS = frozenset(
+    qn(f"a:{name}")
+    for name in (
+        "alphaBiLevel",
+        "alphaCeiling",
+        "alphaFloor",
+        "alphaInv",
+        "alphaMod",
+        "alphaModFix",
+        "alphaRepl",
+        "clrChange",
+    )
+)
+StaticVerdict = Literal["overflow", "pass", "ambiguous"]
+# Affine transform (a, b, c, d, e, f): x' = a*x + b*y + c, y' = d*x + e*y + f.
+Affine = tuple[float, float, float, float, float, float]
+IDENTITY: Affine = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
 
 
 def px_to_emu(px: int, dpi: int) -> Emu:
@@ -34,9 +68,29 @@ def calc_tol(dpi: int) -> int:
     return min(max(tol, 1), 10)
 
 
-def enlarge_deck(src: str, dst: str, pad_emu: Emu) -> tuple[int, int]:
-    """Enlarge the input PPTX with a fixed grey padding and return the new page size."""
+def _is_shown(slide: Any) -> bool:
+    return slide._element.get("show") not in ("0", "false")  # pylint: disable=protected-access
+
+
+def enlarge_deck(
+    src: str, dst: str, pad_emu: Emu, keep: Sequence[int] | None = None
+) -> tuple[int, int]:
+    """Enlarge the input PPTX with a fixed grey padding and return the new page size.
+
+    With `keep` (1-based indices among non-hidden slides), all other slides are dropped, so
+    the enlarged deck renders only those slides, in ascending order.
+    """
     prs = Presentation(src)
+    if keep is not None:
+        sld_id_lst = prs.slides._sldIdLst  # pylint: disable=protected-access
+        shown = 0
+        for sld_id, slide in list(zip(sld_id_lst, prs.slides)):
+            if _is_shown(slide):
+                shown += 1
+                if shown in keep:
+                    continue
+            prs.part.drop_rel(sld_id.rId)
+            sld_id_lst.remove(sld_id)
     w0 = cast(Emu, prs.slide_width)
     h0 = cast(Emu, prs.slide_height)
     w1 = Emu(w0 + 2 * pad_emu)
@@ -75,54 +129,372 @@ def enlarge_deck(src: str, dst: str, pad_emu: Emu) -> tuple[int, int]:
     return int(w1), int(h1)
 
 
+def _compose(outer: Affine, inner: Affine) -> Affine:
+    a1, b1, c1, d1, e1, f1 = outer
+    a2, b2, c2, d2, e2, f2 = inner
+    return (
+        a1 * a2 + b1 * d2,
+        a1 * b2 + b1 * e2,
+        a1 * c2 + b1 * f2 + c1,
+        d1 * a2 + e1 * d2,
+        d1 * b2 + e1 * e2,
+        d1 * c2 + e1 * f2 + f1,
+    )
+
+
+def _spin(shape: BaseShape) -> Affine:
+    """Flip and rotation of `shape` about its own centre, in its parent's coordinates."""
+    xfrm = shape._element.find(".//" + qn("a:xfrm"))  # pylint: disable=protected-access
+    flip_h = xfrm is not None and xfrm.get("flipH") in ("1", "true")
+    flip_v = xfrm is not None and xfrm.get("flipV") in ("1", "true")
+    rot = math.radians(float(getattr(shape, "rotation", 0.0) or 0.0))
+    cx = int(shape.left) + int(shape.width) / 2
+    cy = int(shape.top) + int(shape.height) / 2
+    sx = -1.0 if flip_h else 1.0
+    sy = -1.0 if flip_v else 1.0
+    cos, sin = math.cos(rot), math.sin(rot)
+    # Translate to the centre, flip, rotate clockwise (y points down), translate back.
+    a, b, d, e = cos * sx, -sin * sy, sin * sx, cos * sy
+    return (a, b, cx - a * cx - b * cy, d, e, cy - d * cx - e * cy)
+
+
+def _group_child_transform(group: BaseShape) -> Affine:
+    """Map a group's child coordinates (chOff/chExt) into the group's parent coordinates."""
+    xfrm = group._element.grpSpPr.find(qn("a:xfrm"))  # pylint: disable=protected-access
+    ch_off = xfrm.find(qn("a:chOff")) if xfrm is not None else None
+    ch_ext = xfrm.find(qn("a:chExt")) if xfrm is not None else None
+    ch_x = int(ch_off.get("x")) if ch_off is not None else int(group.left)
+    ch_y = int(ch_off.get("y")) if ch_off is not None else int(group.top)
+    ch_cx = int(ch_ext.get("cx")) if ch_ext is not None else int(group.width)
+    ch_cy = int(ch_ext.get("cy")) if ch_ext is not None else int(group.height)
+    sx = int(group.width) / ch_cx if ch_cx else 1.0
+    sy = int(group.height) / ch_cy if ch_cy else 1.0
+    scale: Affine = (sx, 0.0, int(group.left) - ch_x * sx, 0.0, sy, int(group.top) - ch_y * sy)
+    return _compose(_spin(group), scale)
+
+
+def _leaf_shapes(
+    shapes: Sequence[BaseShape], transform: Affine = IDENTITY
+) -> Iterator[tuple[BaseShape, Affine]]:
+    """Yield non-group shapes with the transform from their coordinates to slide EMUs."""
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            child_transform = _compose(transform, _group_child_transform(shape))
+            yield from _leaf_shapes(shape.shapes, child_transform)  # type: ignore[attr-defined]
+        else:
+            yield shape, transform
+
+
+def _is_opaque_full_picture(shape: BaseShape) -> bool:
+    """True if a picture shows an uncropped, fully opaque raster image over its whole box."""
+    element = shape._element  # pylint: disable=protected-access
+    blip_fill = element.find(qn("p:blipFill"))
+    sp_pr = element.find(qn("p:spPr"))
+    if blip_fill is None or sp_pr is None:
+        return False
+    geom = sp_pr.find(qn("a:prstGeom"))
+    if geom is None or geom.get("prst") != "rect":
+        return False
+    # Any srcRect offset crops the image (positive) or leaves empty space around it (negative).
+    src_rect = blip_fill.find(qn("a:srcRect"))
+    if src_rect is not None and any(src_rect.get(k, "0") != "0" for k in ("l", "t", "r", "b")):
+        return False
+    blip = blip_fill.find(qn("a:blip"))
+    if blip is None or any(child.tag in BLIP_ALPHA_TAGS for child in blip):
+        return False
+    try:
+        with Image.open(io.BytesIO(shape.image.blob)) as img:  # type: ignore[attr-defined]
+            return "A" not in img.getbands() and "transparency" not in img.info
+    except Exception:
+        # Linked, vector (EMF/SVG) or unreadable images: opacity is unknown.
+        return False
+
+
+def _paints_whole_box(shape: BaseShape) -> bool:
+    """True if the shape surely puts pixels everywhere inside its bounding box.
+
+    Charts and OLE objects may have no fill, so they never qualify; pictures qualify only if
+    they are opaque and uncropped.
+    """
+    if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+        return _is_opaque_full_picture(shape)
+    if shape.shape_type in (MSO_SHAPE_TYPE.CHART, MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT):
+        return False
+    sp_pr = shape._element.find(qn("p:spPr"))  # pylint: disable=protected-access
+    if sp_pr is None:
+        return False
+    geom = sp_pr.find(qn("a:prstGeom"))
+    if geom is None or geom.get("prst") != "rect":
+        return False
+    if sp_pr.find(qn("a:noFill")) is not None:
+        return False
+    for fill in ("a:solidFill", "a:gradFill", "a:blipFill", "a:pattFill"):
+        if sp_pr.find(qn(fill)) is not None:
+            return True
+    # No explicit fill: the theme style fills the shape unless its fillRef index is 0.
+    style = shape._element.find(qn("p:style"))  # pylint: disable=protected-access
+    fill_ref = style.find(qn("a:fillRef")) if style is not None else None
+    return fill_ref is not None and fill_ref.get("idx") not in (None, "0")
+
+
+def _text_may_grow(shape: BaseShape) -> bool:
+    """True if rendered text might extend past the shape's box (or the shape might grow)."""
+    if shape.has_table:  # type: ignore[attr-defined]
+        # Rows grow with their content.
+        return True
+    if not shape.has_text_frame or not shape.text_frame.text.strip():  # type: ignore[attr-defined]
+        return False
+    body_pr = shape.text_frame._txBody.bodyPr  # type: ignore[attr-defined]
+    if body_pr.get("wrap") == "none":
+        return True
+    return body_pr.find(qn("a:normAutofit")) is None
+
+
+def precheck_slide(
+    shapes: Sequence[BaseShape], width: int, height: int
+) -> tuple[StaticVerdict, list[dict[str, Any]]]:
+    """Classify a slide from shape geometry alone, without rendering.
+
+    "overflow" if a shape that paints its whole box reaches past the canvas, "pass" if every
+    shape stays inside and none has text that can grow (text without shrink-on-overflow
+    autofit, tables), and "ambiguous" otherwise.
+
+    For "overflow", the second item lists each offending shape: its name, bounding box in
+    slide EMUs, and how far it reaches past each side it crosses (the list is empty otherwise).
+    """
+    verdict: StaticVerdict = "pass"
+    offenders: list[dict[str, Any]] = []
+    for shape, transform in _leaf_shapes(shapes):
+        if None in (shape.left, shape.top, shape.width, shape.height):
+            verdict = "ambiguous"
+            continue
+        a, b, c, d, e, f = _compose(transform, _spin(shape))
+        x0, y0 = int(shape.left), int(shape.top)
+        x1, y1 = x0 + int(shape.width), y0 + int(shape.height)
+        corners = [(x, y) for x in (x0, x1) for y in (y0, y1)]
+        xs = [a * x + b * y + c for x, y in corners]
+        ys = [d * x + e * y + f for x, y in corners]
+        reach = {
+            "top": -min(ys),
+            "bottom": max(ys) - height,
+            "left": -min(xs),
+            "right": max(xs) - width,
+        }
+        beyond = max(reach.values())
+        if beyond > STATIC_SLACK_EMU and _paints_whole_box(shape):
+            offenders.append(
+                {
+                    "shape": shape.name,
+                    "bbox_emu": [round(min(xs)), round(min(ys)), round(max(xs)), round(max(ys))],
+                    "overflow_emu": {
+                        side: round(emu) for side, emu in reach.items() if emu > STATIC_SLACK_EMU
+                    },
+                }
+            )
+        elif beyond > 0 or _text_may_grow(shape):
+            verdict = "ambiguous"
+    return ("overflow", offenders) if offenders else (verdict, [])
+
+
+def precheck_deck(pptx_path: str) -> list[tuple[StaticVerdict, list[dict[str, Any]]]]:
+    """precheck_slide() for each rendered (non-hidden) slide, in rendering order."""
+    prs = Presentation(pptx_path)
+    width, height = int(cast(Emu, prs.slide_width)), int(cast(Emu, prs.slide_height))
+    return [
+        precheck_slide(list(slide.shapes), width, height)
+        for slide in prs.slides
+        if _is_shown(slide)
+    ]
+
+
+def max_mismatch_fraction(dpi: int) -> float:
+    """Fraction of off-colour pixels tolerated per margin (anti-aliasing bleed)."""
+    if dpi >= 300:
+        return 0.01
+    if dpi >= 200:
+        return 0.02
+    return 0.03
+
+
+def _bad_pixels(region: np.ndarray, lo: Sequence[int], hi: Sequence[int]) -> np.ndarray:
+    """Boolean map of pixels outside the per-channel [lo, hi] pad colour bounds."""
+    # 2-D comparisons per channel are much cheaper than a 3-D mask reduced with any().
+    bad = np.zeros(region.shape[:2], dtype=bool)
+    for ch in range(3):
+        channel = region[..., ch]
+        bad |= channel < lo[ch]
+        bad |= channel > hi[ch]
+    return bad
+
+
+def _check_slide(task: tuple[str, float, float, int, str | None]) -> dict[str, Any] | None:
+    """Check the margins of one padded slide image; None if clean.
+
+    Without an overlay path, returns {} as soon as one margin fails. With one, every margin is
+    measured and the result holds, per side with off-colour pixels, their bounding box in
+    image pixels and in EMUs relative to the original canvas, and how far past the canvas
+    edge they reach; a crop of the offending region is written to the overlay path.
+    """
+    img_path, pad_ratio_w, pad_ratio_h, dpi, overlay_path = task
+    tol = calc_tol(dpi)
+    # Per-channel bounds keep the comparison in uint8 instead of upcasting to int16.
+    lo = [max(c - tol, 0) for c in PAD_RGB]
+    hi = [min(c + tol, 255) for c in PAD_RGB]
+    max_mismatch = max_mismatch_fraction(dpi)
+
+    with Image.open(img_path) as img:
+        arr = np.asarray(img if img.mode == "RGB" else img.convert("RGB"))
+
+    h, w, _ = arr.shape
+    # Exclude the innermost 1-pixel band
+    pad_x = int(w * pad_ratio_w) - 1
+    pad_y = int(h * pad_ratio_h) - 1
+
+    # Each border pixel is tested once: full-width top/bottom bands, then the left/right bands
+    # between them. Corners are shared with the side margins they belong to.
+    top = _bad_pixels(arr[:pad_y], lo, hi)
+    bottom = _bad_pixels(arr[h - pad_y :], lo, hi)
+    middle = arr[pad_y : h - pad_y]
+    # Margin maps and their (x, y) offsets in the image, built lazily so a clean top or
+    # bottom band can fail fast without touching the side bands.
+    margins: dict[str, tuple[Callable[[], np.ndarray], tuple[int, int]]] = {
+        "top": (lambda: top, (0, 0)),
+        "bottom": (lambda: bottom, (0, h - pad_y)),
+        "left": (
+            lambda: np.vstack(
+                [top[:, :pad_x], _bad_pixels(middle[:, :pad_x], lo, hi), bottom[:, :pad_x]]
+            ),
+            (0, 0),
+        ),
+        "right": (
+            lambda: np.vstack(
+                [
+                    top[:, w - pad_x :],
+                    _bad_pixels(middle[:, w - pad_x :], lo, hi),
+                    bottom[:, w - pad_x :],
+                ]
+            ),
+            (w - pad_x, 0),
+        ),
+    }
+    measured: dict[str, tuple[np.ndarray, float]] = {}
+    for side, (build, _) in margins.items():
+        bad = build()
+        fraction = float(np.count_nonzero(bad) / bad.size)
+        measured[side] = (bad, fraction)
+        if fraction > max_mismatch and overlay_path is None:
+            return {}
+    if all(fraction <= max_mismatch for _, fraction in measured.values()):
+        return None
+    assert overlay_path is not None
+
+    emu_per_px = EMU_PER_INCH / dpi
+    # Original canvas edges in image pixels.
+    left_px, top_px = w * pad_ratio_w, h * pad_ratio_h
+    right_px, bottom_px = w - left_px, h - top_px
+    sides: dict[str, Any] = {}
+    boxes: list[tuple[int, int, int, int]] = []
+    for side, (bad, fraction) in measured.items():
+        rows = np.flatnonzero(bad.any(axis=1))
+        cols = np.flatnonzero(bad.any(axis=0))
+        if not rows.size:
+            continue
+        off_x, off_y = margins[side][1]
+        x0, y0 = int(cols[0]) + off_x, int(rows[0]) + off_y
+        x1, y1 = int(cols[-1]) + off_x + 1, int(rows[-1]) + off_y + 1
+        reach_px = {
+            "top": top_px - y0,
+            "bottom": y1 - bottom_px,
+            "left": left_px - x0,
+            "right": x1 - right_px,
+        }[side]
+        sides[side] = {
+            "fails": bool(fraction > max_mismatch),
+            "mismatch_fraction": round(fraction, 4),
+            "bbox_px": [x0, y0, x1, y1],
+            "bbox_emu": [
+                round((x0 - left_px) * emu_per_px),
+                round((y0 - top_px) * emu_per_px),
+                round((x1 - left_px) * emu_per_px),
+                round((y1 - top_px) * emu_per_px),
+            ],
+            "overflow_emu": round(reach_px * emu_per_px),
+        }
+        if fraction > max_mismatch:
+            boxes.append((x0, y0, x1, y1))
+
+    # Crop around the failing sides' pixels; tint off-canvas offenders red, outline the canvas.
+    cx0 = max(min(b[0] for b in boxes) - OVERLAY_CONTEXT_PX, 0)
+    cy0 = max(min(b[1] for b in boxes) - OVERLAY_CONTEXT_PX, 0)
+    cx1 = min(max(b[2] for b in boxes) + OVERLAY_CONTEXT_PX, w)
+    cy1 = min(max(b[3] for b in boxes) + OVERLAY_CONTEXT_PX, h)
+    crop = arr[cy0:cy1, cx0:cx1].copy()
+    # Open grids: a column of ys and a row of xs that broadcast to the crop's shape.
+    ys, xs = np.ogrid[cy0:cy1, cx0:cx1]
+    in_margin = (xs < pad_x) | (xs >= w - pad_x) | (ys < pad_y) | (ys >= h - pad_y)
+    offenders = _bad_pixels(crop, lo, hi) & in_margin
+    crop[offenders] = (crop[offenders] * 0.3 + np.array([255, 0, 0]) * 0.7).astype(np.uint8)
+    overlay = Image.fromarray(crop)
+    ImageDraw.Draw(overlay).rectangle(
+        [left_px - cx0, top_px - cy0, right_px - cx0, bottom_px - cy0], outline=(0, 0, 255)
+    )
+    overlay.save(overlay_path)
+    return {"sides": sides, "overlay": overlay_path}
+
+
+def _map_slides(
+    tasks: Sequence[tuple[str, float, float, int, str | None]], jobs: int | None
+) -> list[dict[str, Any] | None]:
+    workers = min(jobs or render_slides.usable_cpus(), len(tasks))
+    if workers <= 1:
+        return [_check_slide(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_check_slide, tasks))
+
+
 def inspect_images(
     paths: Sequence[str],
     pad_ratio_w: float,
     pad_ratio_h: float,
     dpi: int,
+    jobs: int | None = None,
 ) -> list[int]:
-    """Return 1-based indices of slides that contain pixels outside the pad."""
+    """Return 1-based indices of slides that contain pixels outside the pad.
+
+    Slides are checked in parallel on up to `jobs` processes (default: usable CPUs).
+    """
+    tasks = [(path, pad_ratio_w, pad_ratio_h, dpi, None) for path in paths]
+    results = _map_slides(tasks, jobs)
+    return [idx for idx, result in enumerate(results, start=1) if result is not None]
+
+
+def diagnose_images(
+    paths: Sequence[str],
+    overlay_paths: Sequence[str],
+    pad_ratio_w: float,
+    pad_ratio_h: float,
+    dpi: int,
+    jobs: int | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Like inspect_images(), but map each failing 1-based index to per-side diagnostics.
+
+    The overlay crop of slide i is written to overlay_paths[i - 1]; see _check_slide().
+    """
+    tasks = [
+        (path, pad_ratio_w, pad_ratio_h, dpi, overlay_path)
+        for path, overlay_path in zip(paths, overlay_paths)
+    ]
+    results = _map_slides(tasks, jobs)
+    return {idx: result for idx, result in enumerate(results, start=1) if result is not None}
 
-    tol = calc_tol(dpi)
-    failures: list[int] = []
-    pad_colour = np.array(PAD_RGB, dtype=np.uint8)
-
-    for idx, img_path in enumerate(paths, start=1):
-        with Image.open(img_path) as img:
-            rgb = img.convert("RGB")
-            arr = np.asarray(rgb)
-
-        h, w, _ = arr.shape
-        # Exclude the innermost 1-pixel band
-        pad_x = int(w * pad_ratio_w) - 1
-        pad_y = int(h * pad_ratio_h) - 1
-
-        left_margin = arr[:, :pad_x, :]
-        right_margin = arr[:, w - pad_x :, :]
-        top_margin = arr[:pad_y, :, :]
-        bottom_margin = arr[h - pad_y :, :, :]
-
-        def _is_clean(margin: np.ndarray) -> bool:
-            diff = np.abs(margin.astype(np.int16) - pad_colour)
-            matches = np.all(diff <= tol, axis=-1)
-            mismatch_fraction = 1.0 - (np.count_nonzero(matches) / matches.size)
-            if dpi >= 300:
-                max_mismatch = 0.01
-            elif dpi >= 200:
-                max_mismatch = 0.02
-            else:
-                max_mismatch = 0.03
-            return mismatch_fraction <= max_mismatch
-
-        if not (
-            _is_clean(left_margin)
-            and _is_clean(right_margin)
-            and _is_clean(top_margin)
-            and _is_clean(bottom_margin)
-        ):
-            failures.append(idx)
-
-    return failures
+
+def remove_previous_outputs(out_dir: str) -> None:
+    """Delete slide images an earlier run wrote to out_dir, leaving every other file alone."""
+    if not isdir(out_dir):
+        return
+    for name in listdir(out_dir):
+        if OUTPUT_NAME_RE.fullmatch(name):
+            remove(join(out_dir, name))
 
 
 def main() -> None:
@@ -161,33 +533,126 @@ def main() -> None:
         default=PAD_PX,
         help="Padding in pixels to add on each side before rasterization.",
     )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=None,
+        help=(
+            "Directory for the padded images of failing slides; slide-N.png and "
+            "slide-N-overflow.png files from earlier runs are replaced. Defaults to a new "
+            "slides_test_<deck name>_* directory in the system temp directory."
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        default=False,
+        help=(
+            "Print a JSON report instead of text: failing slides and, per rendered failure, "
+            "the per-side bounding box and overflow in EMUs plus an overlay crop path; per "
+            "failure found from shape geometry, the offending shapes with the same measures."
+        ),
+    )
+    parser.add_argument(
+        "--no_precheck",
+        action="store_true",
+        default=False,
+        help=(
+            "Skip the static geometry pre-check and always render. By default slides are first "
+            "classified from shape geometry, and rendering runs only if some slide is ambiguous."
+        ),
+    )
     args = parser.parse_args()
 
     input_path = abspath(expanduser(args.input_path))
+    out_dir = abspath(expanduser(args.output_dir)) if args.output_dir else None
+    suspects: list[int] | None = None
+    static_offenders: dict[int, list[dict[str, Any]]] = {}
+    if not args.no_precheck:
+        verdicts = precheck_deck(input_path)
+        static_offenders = {
+            i: offenders
+            for i, (verdict, offenders) in enumerate(verdicts, start=1)
+            if verdict == "overflow"
+        }
+        suspects = [i for i, (verdict, _) in enumerate(verdicts, start=1) if verdict == "ambiguous"]
+    static_failing = sorted(static_offenders)
+
     # Width and height refer to the original, unaltered slide dimensions.
     dpi = render_slides.calc_dpi_via_ooxml(input_path, args.width, args.height)
-
-    # Not using ``tempfile.TemporaryDirectory(delete=False)`` for Python 3.11 compatibility.
-    tmpdir = tempfile.mkdtemp()
-    enlarged_pptx = join(tmpdir, "enlarged.pptx")
-    pad_emu = px_to_emu(args.pad_px, dpi)
-    w1, h1 = enlarge_deck(input_path, enlarged_pptx, pad_emu=pad_emu)
-    pad_ratio_w = pad_emu / w1
-    pad_ratio_h = pad_emu / h1
-
-    img_dir = join(tmpdir, "imgs")
-    img_paths = render_slides.rasterize(enlarged_pptx, img_dir, dpi)
-    failing = inspect_images(img_paths, pad_ratio_w, pad_ratio_h, dpi)
-
-    if failing:
+    diagnostics: dict[int, dict[str, Any]] = {}
+    if out_dir:
+        remove_previous_outputs(out_dir)
+    if suspects is None or suspects:
+        with tempfile.TemporaryDirectory(prefix="slides_test_") as tmpdir:
+            enlarged_pptx = join(tmpdir, "enlarged.pptx")
+            pad_emu = px_to_emu(args.pad_px, dpi)
+            # Only the suspect slides are kept, so conversion and rasterization scale with them.
+            w1, h1 = enlarge_deck(input_path, enlarged_pptx, pad_emu=pad_emu, keep=suspects)
+            pad_ratio_w = pad_emu / w1
+            pad_ratio_h = pad_emu / h1
+
+            img_dir = join(tmpdir, "imgs")
+            img_paths = render_slides.rasterize(enlarged_pptx, img_dir, dpi)
+            slide_nums = suspects or list(range(1, len(img_paths) + 1))
+            # The fail-fast check decides; only failing slides are measured and cropped.
+            failed = inspect_images(img_paths, pad_ratio_w, pad_ratio_h, dpi)
+            if failed:
+                if out_dir:
+                    makedirs(out_dir, exist_ok=True)
+                else:
+                    # A fresh directory per run: concurrent runs on same-named decks never clash.
+                    stem = splitext(basename(input_path))[0]
+                    out_dir = tempfile.mkdtemp(prefix=f"slides_test_{stem}_")
+                found = diagnose_images(
+                    [img_paths[i - 1] for i in failed],
+                    [join(out_dir, f"slide-{slide_nums[i - 1]}-overflow.png") for i in failed],
+                    pad_ratio_w,
+                    pad_ratio_h,
+                    dpi,
+                )
+                for k, result in found.items():
+                    num = slide_nums[failed[k - 1] - 1]
+                    image_path = join(out_dir, f"slide-{num}.png")
+                    shutil.copyfile(img_paths[failed[k - 1] - 1], image_path)
+                    diagnostics[num] = {"image": image_path, **result}
+
+    # Geometry-confirmed overflows count even if anti-aliasing tolerance hid them in pixels.
+    failing = sorted(set(diagnostics) | set(static_failing))
+    if args.json:
+        report = {
+            "passed": not failing,
+            "failing": failing,
+            "static_overflow": static_failing,
+            # Statically failing slides are not rendered, so they carry the shape geometry.
+            "slides": {
+                str(num): diagnostics.get(num) or {"shapes": static_offenders[num]}
+                for num in failing
+            },
+        }
+        print(json.dumps(report, indent=2))
+    elif failing:
         print(
             "ERROR: Slides with content overflowing original canvas (1-based indexing): "
             + ", ".join(map(str, failing))
-            + "\n"
-            + "Rendered images with grey paddings for problematic slides are available at: "
         )
-        for i in failing:
-            print(img_paths[i - 1])
+        if static_failing:
+            print("Detected from shape geometry:")
+            for num in static_failing:
+                for offender in static_offenders[num]:
+                    sides = ", ".join(
+                        f"{side} by {emu} EMU" for side, emu in offender["overflow_emu"].items()
+                    )
+                    print(f"slide {num}: {offender['shape']} ({sides})")
+        if diagnostics:
+            print("Rendered images with grey paddings for problematic slides are available at: ")
+            for num in sorted(diagnostics):
+                sides = ", ".join(
+                    f"{side} by {info['overflow_emu']} EMU"
+                    for side, info in diagnostics[num]["sides"].items()
+                    if info["fails"]
+                )
+                print(f"{diagnostics[num]['image']} ({sides}; crop: {diagnostics[num]['overlay']})")
     else:
         print("Test passed. No overflow detected.")
 
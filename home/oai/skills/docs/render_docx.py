@@ -1,17 +1,81 @@
 import argparse
+import hashlib
+import json
 import os
 import re
+import shutil
 import subprocess
 import tempfile
+import threading
+import time
 import xml.etree.ElementTree as ET
-from os import makedirs, replace
-from os.path import abspath, basename, exists, expanduser, join, splitext
-from typing import Sequence, cast
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from os import listdir, makedirs, replace
+from os.path import abspath, basename, exists, expanduser, isdir, join, splitext
+from typing import Any, Callable, Iterator, Sequence, cast
 from zipfile import ZipFile
 
 from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
 
 TWIPS_PER_INCH: int = 1440
+W_NS: str = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+SOFFICE_START_TIMEOUT_S: float = 60.0
+SOFFICE_CONVERT_TIMEOUT_S: float = 300.0
+# Upper bound on memory for full-page RGB buffers across concurrent pdftoppm processes.
+RASTER_MEMORY_BUDGET_BYTES: int = 2 << 30
+# Output format -> file extension. WebP is encoded with Pillow from an uncompressed PPM.
+IMAGE_EXTS: dict[str, str] = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+WEBP_QUALITY: int = 80
+# Pages rasterised per window in streaming mode.
+STREAM_WINDOW_PAGES: int = 16
+DOCX_EXTS: tuple[str, ...] = (".docx", ".docm", ".dotx", ".dotm")
+# Extensions picked up when a directory is given in batch mode.
+BATCH_EXTS: tuple[str, ...] = DOCX_EXTS + (".doc", ".dot", ".odt", ".rtf", ".pdf")
+# Files per `soffice --convert-to` call in batch mode; rasterization of one chunk overlaps
+# the conversion of the next.
+CONVERT_BATCH_SIZE: int = 16
+
+
+def docx_section_page_sizes(
+    input_path: str, first_only: bool = False
+) -> list[tuple[float, float]]:
+    """Return the page size in inches of each section in `word/document.xml` (w:pgSz in twips).
+
+    The part is streamed with iterparse and finished body-level elements are dropped, so
+    memory stays flat however large the body is. With `first_only`, parsing stops at the first
+    w:pgSz; since a section's properties follow its content, that is the end of section one.
+    """
+    sizes: list[tuple[float, float]] = []
+    body = None
+    with ZipFile(input_path, "r") as zf, zf.open("word/document.xml") as f:
+        # Start events only: pgSz attributes are complete at start, and skipping end events
+        # halves the per-element overhead on large bodies.
+        for _, elem in ET.iterparse(f, events=("start",)):
+            if elem.tag != f"{{{W_NS}}}pgSz":
+                if body is None:
+                    if elem.tag == f"{{{W_NS}}}body":
+                        body = elem
+                elif len(body) > 64:
+                    # Drop finished paragraphs/tables, keeping the one being parsed.
+                    del body[:-1]
+                continue
+            # Values are in twips
+            w_twips_str = elem.get(f"{{{W_NS}}}w") or elem.get("w")
+            h_twips_str = elem.get(f"{{{W_NS}}}h") or elem.get("h")
+            if not w_twips_str or not h_twips_str:
+                raise RuntimeError("Page size attributes missing in pgSz")
+            width_in = int(w_twips_str) / TWIPS_PER_INCH
+            height_in = int(h_twips_str) / TWIPS_PER_INCH
+            if width_in <= 0 or height_in <= 0:
+                raise RuntimeError("Invalid page size values in document.xml")
+            sizes.append((width_in, height_in))
+            if first_only:
+                break
+    if not sizes:
+        raise RuntimeError("Page size not found in document.xml")
+    return sizes
 
 
 def calc_dpi_via_ooxml_docx(input_path: str, max_w_px: int, max_h_px: int) -> int:
@@ -21,68 +85,134 @@ def calc_dpi_via_ooxml_docx(input_path: str, max_w_px: int, max_h_px: int) -> in
     We read the first encountered section's page size and compute an isotropic DPI
     that fits within the target max pixel dimensions.
     """
-    with ZipFile(input_path, "r") as zf:
-        xml = zf.read("word/document.xml")
-    root = ET.fromstring(xml)
-    ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-
-    # Common placements: w:body/w:sectPr or w:body/w:p/w:pPr/w:sectPr
-    sect_pr = root.find(".//w:sectPr", ns)
-    if sect_pr is None:
-        raise RuntimeError("Section properties not found in document.xml")
-    pg_sz = sect_pr.find("w:pgSz", ns)
-    if pg_sz is None:
-        raise RuntimeError("Page size not found in section properties")
-
-    # Values are in twips
-    w_twips_str = pg_sz.get(
-        "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}w"
-    ) or pg_sz.get("w")
-    h_twips_str = pg_sz.get(
-        "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}h"
-    ) or pg_sz.get("h")
-
-    if not w_twips_str or not h_twips_str:
-        raise RuntimeError("Page size attributes missing in pgSz")
-
-    width_in = int(w_twips_str) / TWIPS_PER_INCH
-    height_in = int(h_twips_str) / TWIPS_PER_INCH
+    width_in, height_in = docx_section_page_sizes(input_path, first_only=True)[0]
+    return round(min(max_w_px / width_in, max_h_px / height_in))
+
+
+def pdf_page_size_in(info: dict) -> tuple[float, float]:
+    """Return the first page size in inches from `pdfinfo_from_path` output."""
+    size_val = info.get("Page size")
+    if not size_val:
+        for k, v in info.items():
+            if isinstance(v, str) and "size" in k.lower() and "pts" in v:
+                size_val = v
+                break
+    if not isinstance(size_val, str):
+        raise RuntimeError("Failed to read PDF page size for DPI computation.")
+    return _parse_pts_size(size_val)
+
+
+def _parse_pts_size(size_val: str) -> tuple[float, float]:
+    # e.g. "595.304 x 841.89 pts (A4)"
+    m = re.search(r"(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*pts", size_val)
+    if not m:
+        raise RuntimeError("Unrecognized PDF page size format.")
+    width_pts = float(m.group(1))
+    height_pts = float(m.group(2))
+    width_in = width_pts / 72.0
+    height_in = height_pts / 72.0
     if width_in <= 0 or height_in <= 0:
-        raise RuntimeError("Invalid page size values in document.xml")
+        raise RuntimeError("Invalid PDF page size values.")
+    return width_in, height_in
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def calc_dpi_from_pdf(pdf_path: str, max_w_px: int, max_h_px: int) -> int:
+    """Compute DPI from the first page size of an existing PDF."""
+    width_in, height_in = pdf_page_size_in(pdfinfo_from_path(pdf_path))
     return round(min(max_w_px / width_in, max_h_px / height_in))
 
 
-def calc_dpi_via_pdf(input_path: str, max_w_px: int, max_h_px: int) -> int:
+def calc_page_dpis_from_pdf(pdf_path: str, max_w_px: int, max_h_px: int) -> list[int]:
+    """Compute a DPI for every page of an existing PDF, so mixed orientations each fit."""
+    page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+    info = pdfinfo_from_path(pdf_path, first_page=1, last_page=page_count)
+    sizes: dict[int, tuple[float, float]] = {}
+    rotated: set[int] = set()
+    for key, val in info.items():
+        m = re.fullmatch(r"Page\s+(\d+)\s+(size|rot)", key)
+        if not m:
+            continue
+        if m.group(2) == "size":
+            sizes[int(m.group(1))] = _parse_pts_size(str(val))
+        elif int(val) % 180:
+            rotated.add(int(m.group(1)))
+    if len(sizes) != page_count:
+        raise RuntimeError("Failed to read per-page PDF sizes for DPI computation.")
+    dpis = []
+    for page in range(1, page_count + 1):
+        width_in, height_in = sizes[page]
+        if page in rotated:
+            width_in, height_in = height_in, width_in
+        dpis.append(round(min(max_w_px / width_in, max_h_px / height_in)))
+    return dpis
+
+
+def choose_dpi(
+    input_path: str,
+    pdf_path: str,
+    max_w_px: int,
+    max_h_px: int,
+    dpi_override: int | None = None,
+) -> int | list[int]:
+    """DPI for input_path: one value, or one per page when page sizes differ.
+
+    DOCX sizes come from the section properties; mixed sections and other inputs use the
+    PDF's page sizes, since sections map to pages only after layout.
+    """
+    if dpi_override is not None:
+        return int(dpi_override)
+    try:
+        if not input_path.lower().endswith(DOCX_EXTS):
+            raise RuntimeError("Skip OOXML DPI; not a DOCX container")
+        sizes = docx_section_page_sizes(input_path)
+        if len(set(sizes)) > 1:
+            raise RuntimeError("Skip OOXML DPI; mixed section page sizes")
+        width_in, height_in = sizes[0]
+        return round(min(max_w_px / width_in, max_h_px / height_in))
+    except Exception:
+        dpis = calc_page_dpis_from_pdf(pdf_path, max_w_px, max_h_px)
+        return dpis[0] if len(set(dpis)) == 1 else dpis
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def usable_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def plan_thread_count(
+    page_count: int,
+    page_size_in: tuple[float, float],
+    dpi: int,
+    jobs: int | None = None,
+    memory_budget: int = RASTER_MEMORY_BUDGET_BYTES,
+) -> int:
+    """Return how many pdftoppm processes to run for `page_count` pages.
+
+    convert_from_path splits the page range evenly across `thread_count` processes, each
+    holding one page bitmap at a time. The count is bounded by `jobs` (default: usable
+    CPUs), the page count, and how many page bitmaps at `dpi` fit in `memory_budget`.
+    """
+    if jobs is None:
+        jobs = usable_cpus()
+    page_bytes = max(1, round(page_size_in[0] * dpi) * round(page_size_in[1] * dpi) * 3)
+    return max(1, min(jobs or 1, page_count, memory_budget // page_bytes))
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def calc_dpi_via_pdf(
+    input_path: str, max_w_px: int, max_h_px: int, pool: "SofficePool | None" = None
+) -> int:
     """Convert input to PDF and compute DPI from its page size."""
-    with tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile:
-        with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
-            stem = splitext(basename(input_path))[0]
-            pdf_path = convert_to_pdf(input_path, user_profile, convert_tmp_dir, stem)
-            if not (pdf_path and exists(pdf_path)):
-                raise RuntimeError("Failed to convert input to PDF for DPI computation.")
-
-            info = pdfinfo_from_path(pdf_path)
-            size_val = info.get("Page size")
-            if not size_val:
-                for k, v in info.items():
-                    if isinstance(v, str) and "size" in k.lower() and "pts" in v:
-                        size_val = v
-                        break
-            if not isinstance(size_val, str):
-                raise RuntimeError("Failed to read PDF page size for DPI computation.")
-
-            m = re.search(r"(\d+)\s*x\s*(\d+)\s*pts", size_val)
-            if not m:
-                raise RuntimeError("Unrecognized PDF page size format.")
-            width_pts = int(m.group(1))
-            height_pts = int(m.group(2))
-            width_in = width_pts / 72.0
-            height_in = height_pts / 72.0
-            if width_in <= 0 or height_in <= 0:
-                raise RuntimeError("Invalid PDF page size values.")
-            return round(min(max_w_px / width_in, max_h_px / height_in))
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(input_path, convert_tmp_dir, pool)
+        return calc_dpi_from_pdf(pdf_path, max_w_px, max_h_px)
 
 
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
 def run_cmd_no_check(cmd: list[str]) -> None:
     subprocess.run(
         cmd,
@@ -93,6 +223,7 @@ def run_cmd_no_check(cmd: list[str]) -> None:
     )
 
 
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
 def convert_to_pdf(
     doc_path: str,
     user_profile: str,
@@ -155,67 +286,634 @@ def convert_to_pdf(
     return ""
 
 
-def rasterize(
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def convert_batch_to_pdf(
+    doc_paths: Sequence[str], user_profile: str, convert_tmp_dir: str
+) -> dict[str, str]:
+    """Convert many inputs with one soffice call per group and map each input to its PDF.
+
+    LibreOffice names each output after the input's stem, so inputs sharing a stem go to
+    separate groups, each with its own output directory. Inputs without a PDF afterwards are
+    retried alone through convert_to_pdf() and its ODT fallback; "" marks a failure.
+    """
+    groups: list[dict[str, str]] = []
+    for doc_path in doc_paths:
+        stem = splitext(basename(doc_path))[0]
+        group = next((g for g in groups if stem not in g), None)
+        if group is None:
+            group = {}
+            groups.append(group)
+        group[stem] = doc_path
+    pdf_paths: dict[str, str] = {}
+    for i, group in enumerate(groups):
+        group_dir = join(convert_tmp_dir, f"batch-{i}")
+        makedirs(group_dir, exist_ok=True)
+        cmd_pdf = [
+            "soffice",
+            "-env:UserInstallation=file://" + user_profile,
+            "--invisible",
+            "--headless",
+            "--norestore",
+            "--convert-to",
+            "pdf",
+            "--outdir",
+            group_dir,
+            *group.values(),
+        ]
+        run_cmd_no_check(cmd_pdf)
+        for stem, doc_path in group.items():
+            pdf_path = join(group_dir, f"{stem}.pdf")
+            if not exists(pdf_path):
+                pdf_path = convert_to_pdf(doc_path, user_profile, group_dir, stem)
+            pdf_paths[doc_path] = pdf_path
+    return pdf_paths
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def _import_uno() -> Any:
+    """Import LibreOffice's Python bindings, which only SofficeWorker needs.
+
+    Importing uno bootstraps pyuno and installs a global import hook, so it is not done at
+    module import time.
+    """
+    try:
+        import uno  # type: ignore
+    except ImportError:
+        raise RuntimeError("LibreOffice Python bindings (uno) are not available.") from None
+    return uno
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def _uno_props(uno: Any, **kwargs: Any) -> tuple:
+    props = []
+    for name, value in kwargs.items():
+        prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+class SofficeWorker:
+    """A long-lived headless soffice instance with its own user profile, driven over UNO."""
+
+    def __init__(self, convert_timeout: float = SOFFICE_CONVERT_TIMEOUT_S) -> None:
+        self.uno = _import_uno()
+        self.convert_timeout = convert_timeout
+        self.user_profile = tempfile.mkdtemp(prefix="soffice_profile_")
+        self.pipe_name = "render_" + basename(self.user_profile)
+        self.proc: subprocess.Popen | None = None
+        self.desktop: Any = None
+        # Set once a restart fails; a dead worker refuses further conversions.
+        self.dead = False
+        try:
+            self.start()
+        except Exception:
+            self.close()
+            raise
+
+    def start(self) -> None:
+        self.proc = subprocess.Popen(
+            [
+                "soffice",
+                "-env:UserInstallation=file://" + self.user_profile,
+                "--invisible",
+                "--headless",
+                "--norestore",
+                "--nologo",
+                "--nodefault",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=os.environ.copy(),
+        )
+        local_ctx = self.uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        deadline = time.monotonic() + SOFFICE_START_TIMEOUT_S
+        while True:
+            try:
+                ctx = resolver.resolve(
+                    f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+                )
+                self.desktop = ctx.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.frame.Desktop", ctx
+                )
+                return
+            except Exception:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("soffice worker failed to start.")
+                time.sleep(0.2)
+
+    def stop(self) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+        self.desktop = None
+
+    def close(self) -> None:
+        self.stop()
+        shutil.rmtree(self.user_profile, ignore_errors=True)
+
+    def is_healthy(self) -> bool:
+        if self.proc is None or self.proc.poll() is not None:
+            return False
+        try:
+            self.desktop.getFrames()
+            return True
+        except Exception:
+            return False
+
+    def _call(self, fn: Callable[[], None]) -> bool:
+        """Run a UNO call with a timeout and restart the instance if it hangs or dies.
+
+        If the restart fails too, the worker is marked dead and this and later calls fail.
+        """
+        if self.dead:
+            return False
+        result: dict[str, bool] = {}
+
+        def target() -> None:
+            try:
+                fn()
+                result["ok"] = True
+            except Exception:
+                result["ok"] = False
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(self.convert_timeout)
+        if thread.is_alive() or not self.is_healthy():
+            self.stop()
+            try:
+                self.start()
+            except Exception:
+                self.dead = True
+            return False
+        return result.get("ok", False)
+
+    def _export(self, src_path: str, dst_path: str, filter_name: str) -> bool:
+        def export() -> None:
+            doc = self.desktop.loadComponentFromURL(
+                self.uno.systemPathToFileUrl(src_path),
+                "_blank",
+                0,
+                _uno_props(self.uno, Hidden=True),
+            )
+            if doc is None:
+                raise RuntimeError("soffice could not load " + src_path)
+            try:
+                doc.storeToURL(
+                    self.uno.systemPathToFileUrl(dst_path),
+                    _uno_props(self.uno, FilterName=filter_name),
+                )
+            finally:
+                doc.close(True)
+
+        return self._call(export) and exists(dst_path)
+
+    def convert_to_pdf(self, doc_path: str, convert_tmp_dir: str, stem: str) -> str:
+        # Same strategy as convert_to_pdf: direct export, then via ODT.
+        pdf_path = join(convert_tmp_dir, f"{stem}.pdf")
+        if self._export(doc_path, pdf_path, "writer_pdf_Export"):
+            return pdf_path
+        odt_path = join(convert_tmp_dir, f"{stem}.odt")
+        if self._export(doc_path, odt_path, "writer8"):
+            if self._export(odt_path, pdf_path, "writer_pdf_Export"):
+                return pdf_path
+        return ""
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+class SofficePool:
+    """A pool of SofficeWorkers; each conversion is dispatched to an idle worker.
+
+    Use it for many conversions in one process to pay soffice startup once per worker.
+    Workers that die are dropped; once none is left, conversions fail (return "").
+    """
+
+    def __init__(self, size: int, convert_timeout: float = SOFFICE_CONVERT_TIMEOUT_S) -> None:
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self._cond = threading.Condition()
+        self._idle: list[SofficeWorker] = []
+        self._live = 0
+        self._workers: list[SofficeWorker] = []
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            futures = [executor.submit(SofficeWorker, convert_timeout) for _ in range(size)]
+        errors = []
+        for future in futures:
+            try:
+                self._workers.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            # Every worker that did start is shut down, not just those before the failure.
+            self.close()
+            raise errors[0]
+        self._idle = list(self._workers)
+        self._live = len(self._workers)
+
+    def convert_to_pdf(self, doc_path: str, convert_tmp_dir: str, stem: str) -> str:
+        with self._cond:
+            self._cond.wait_for(lambda: self._idle or not self._live)
+            if not self._idle:
+                return ""
+            worker = self._idle.pop()
+        try:
+            return worker.convert_to_pdf(doc_path, convert_tmp_dir, stem)
+        finally:
+            with self._cond:
+                if worker.dead:
+                    self._live -= 1
+                else:
+                    self._idle.append(worker)
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+
+    def __enter__(self) -> "SofficePool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def produce_pdf(
     doc_path: str,
-    out_dir: str,
-    dpi: int,
-) -> Sequence[str]:
-    """Rasterise DOCX (or similar) to images placed in out_dir and return their paths.
+    convert_tmp_dir: str,
+    pool: SofficePool | None = None,
+    cache_dir: str | None = None,
+) -> str:
+    """Convert the input to PDF once and return the PDF path.
 
-    Images are named as page-<N>.<ext> with pages starting at 1.
+    PDF inputs are returned as-is. With `cache_dir`, PDFs are kept under the SHA-256 of the
+    input bytes, so re-rendering an unchanged input skips LibreOffice entirely; the returned
+    path then points into the cache.
     """
-    makedirs(out_dir, exist_ok=True)
     doc_path = abspath(doc_path)
+    if doc_path.lower().endswith(".pdf"):
+        # Already a PDF: rasterize it directly.
+        return doc_path
     stem = splitext(basename(doc_path))[0]
+    cached_pdf = ""
+    if cache_dir:
+        cached_pdf = join(cache_dir, f"docx-{file_digest(doc_path)}.pdf")
+        if exists(cached_pdf):
+            return cached_pdf
 
-    # Use a unique user profile to avoid LibreOffice profile lock when running concurrently
-    with tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile:
-        # Write conversion outputs into a temp directory to avoid any IO oddities
-        with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
-            pdf_path = convert_to_pdf(
-                doc_path,
-                user_profile,
-                convert_tmp_dir,
-                stem,
-            )
+    if pool is not None:
+        pdf_path = pool.convert_to_pdf(doc_path, convert_tmp_dir, stem)
+    else:
+        # Use a unique user profile to avoid LibreOffice profile lock when running concurrently
+        with tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile:
+            pdf_path = convert_to_pdf(doc_path, user_profile, convert_tmp_dir, stem)
+    if not pdf_path or not exists(pdf_path):
+        raise RuntimeError("Failed to produce PDF for rasterization (direct and ODT fallback).")
 
-            if not pdf_path or not exists(pdf_path):
-                raise RuntimeError(
-                    "Failed to produce PDF for rasterization (direct and ODT fallback)."
-                )
-            paths_raw = cast(
-                list[str],
-                convert_from_path(
-                    pdf_path,
-                    dpi=dpi,
-                    fmt="png",
-                    thread_count=8,
-                    output_folder=out_dir,
-                    paths_only=True,
-                    output_file="page",
-                ),
+    if cached_pdf:
+        store_cached_pdf(pdf_path, cached_pdf)
+    return pdf_path
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def store_cached_pdf(pdf_path: str, cached_pdf: str) -> None:
+    makedirs(os.path.dirname(cached_pdf), exist_ok=True)
+    # Copy then rename so concurrent renders never read a partial PDF.
+    tmp_pdf = f"{cached_pdf}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(pdf_path, tmp_pdf)
+    replace(tmp_pdf, cached_pdf)
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def _encode_webp(src_path: str, dst_path: str) -> None:
+    with Image.open(src_path) as img:
+        img.save(dst_path, "WEBP", quality=WEBP_QUALITY)
+    os.remove(src_path)
+
+
+def rasterize_pdf(
+    pdf_path: str,
+    out_dir: str,
+    dpi: int | Sequence[int],
+    jobs: int | None = None,
+    fmt: str = "png",
+) -> Sequence[str]:
+    """Rasterise an existing PDF to page-<N>.<ext> files in out_dir and return their paths.
+
+    `dpi` is either one value or one per page (see calc_page_dpis_from_pdf). `jobs` caps the
+    number of concurrent pdftoppm processes (see plan_thread_count). `fmt` is a key of
+    IMAGE_EXTS.
+    """
+    makedirs(out_dir, exist_ok=True)
+    info = pdfinfo_from_path(pdf_path)
+    if not isinstance(dpi, int):
+        paths: list[str] = []
+        for first_page, last_page, run_dpi in _dpi_runs(dpi, 1, len(dpi)):
+            thread_count = plan_thread_count(
+                last_page - first_page + 1, pdf_page_size_in(info), run_dpi, jobs
+            )
+            paths += _convert_range(
+                pdf_path, out_dir, run_dpi, first_page, last_page, thread_count, fmt
             )
+        return paths
+    thread_count = plan_thread_count(int(info["Pages"]), pdf_page_size_in(info), dpi, jobs)
+    paths_raw = cast(
+        list[str],
+        convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            fmt="ppm" if fmt == "webp" else fmt,
+            thread_count=thread_count,
+            output_folder=out_dir,
+            paths_only=True,
+            output_file="page",
+        ),
+    )
+    return _rename_pages(paths_raw, out_dir, fmt)
+
 
-    # Rename convert_from_path's output format f'page{thread_id:04d}-{page_num:02d}.<ext>' to 'page-<num>.<ext>'
+def _dpi_runs(dpis: Sequence[int], first_page: int, last_page: int) -> list[tuple[int, int, int]]:
+    """Split 1-based pages first..last into (first, last, dpi) runs of equal DPI."""
+    runs: list[tuple[int, int, int]] = []
+    for page in range(first_page, last_page + 1):
+        if runs and runs[-1][2] == dpis[page - 1]:
+            runs[-1] = (runs[-1][0], page, runs[-1][2])
+        else:
+            runs.append((page, page, dpis[page - 1]))
+    return runs
+
+
+def _convert_range(
+    pdf_path: str,
+    out_dir: str,
+    dpi: int,
+    first_page: int,
+    last_page: int,
+    thread_count: int,
+    fmt: str,
+) -> list[str]:
+    """Rasterise pages first..last via a scratch directory and move them into out_dir."""
+    # A private output folder keeps pdf2image's directory listing to this range's files.
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=".range_") as range_dir:
+        paths_raw = cast(
+            list[str],
+            convert_from_path(
+                pdf_path,
+                dpi=dpi,
+                fmt="ppm" if fmt == "webp" else fmt,
+                thread_count=thread_count,
+                first_page=first_page,
+                last_page=last_page,
+                output_folder=range_dir,
+                paths_only=True,
+                output_file="page",
+            ),
+        )
+        return _rename_pages(paths_raw, out_dir, fmt)
+
+
+def _rename_pages(paths_raw: Sequence[str], out_dir: str, fmt: str) -> list[str]:
+    # Rename convert_from_path's output format f'page{thread_id:04d}-{page_num:02d}.png' to 'page-<num>.png'
     pages: list[tuple[int, str]] = []
     for src_path in paths_raw:
         base = splitext(basename(src_path))[0]
         page_num_str = base.split("-")[-1]
         page_num = int(page_num_str)
-        dst_path = join(out_dir, f"page-{page_num}.png")
-        replace(src_path, dst_path)
+        dst_path = join(out_dir, f"page-{page_num}.{IMAGE_EXTS[fmt]}")
+        if fmt == "webp":
+            _encode_webp(src_path, dst_path)
+        else:
+            replace(src_path, dst_path)
         pages.append((page_num, dst_path))
     pages.sort(key=lambda t: t[0])
     final_paths = [path for _, path in pages]
     return final_paths
 
 
+def iter_rasterize_pdf(
+    pdf_path: str,
+    out_dir: str,
+    dpi: int | Sequence[int],
+    window: int = STREAM_WINDOW_PAGES,
+    jobs: int | None = None,
+    fmt: str = "png",
+) -> Iterator[str]:
+    """Rasterise an existing PDF window by window, yielding page-<N>.<ext> paths in page order.
+
+    Each window of `window` pages is rendered into its own scratch directory and renamed into
+    out_dir as soon as it finishes. The next window renders while the caller consumes the
+    current one, so at most two windows of pages are in flight at any time.
+    """
+    makedirs(out_dir, exist_ok=True)
+    info = pdfinfo_from_path(pdf_path)
+    page_count = int(info["Pages"])
+    window = max(1, window)
+    dpis = [dpi] * page_count if isinstance(dpi, int) else list(dpi)
+    thread_count = plan_thread_count(
+        min(window, page_count), pdf_page_size_in(info), max(dpis, default=1), jobs
+    )
+
+    def render(first_page: int) -> list[str]:
+        last_page = min(first_page + window - 1, page_count)
+        paths: list[str] = []
+        for run_first, run_last, run_dpi in _dpi_runs(dpis, first_page, last_page):
+            paths += _convert_range(
+                pdf_path, out_dir, run_dpi, run_first, run_last, thread_count, fmt
+            )
+        return paths
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Queue window k+1 before yielding window k so rendering overlaps the consumer.
+        current = None
+        for first_page in range(1, page_count + 1, window):
+            queued = executor.submit(render, first_page)
+            if current is not None:
+                yield from current.result()
+            current = queued
+        if current is not None:
+            yield from current.result()
+
+
+def iter_rasterize(
+    doc_path: str,
+    out_dir: str,
+    dpi: int | Sequence[int],
+    pool: SofficePool | None = None,
+    cache_dir: str | None = None,
+    window: int = STREAM_WINDOW_PAGES,
+    jobs: int | None = None,
+    fmt: str = "png",
+) -> Iterator[str]:
+    """Streaming variant of rasterize(): yield each page image path as soon as it is ready."""
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(doc_path, convert_tmp_dir, pool, cache_dir)
+        yield from iter_rasterize_pdf(pdf_path, out_dir, dpi, window, jobs, fmt)
+
+
+def rasterize(
+    doc_path: str,
+    out_dir: str,
+    dpi: int,
+    pool: SofficePool | None = None,
+    cache_dir: str | None = None,
+    jobs: int | None = None,
+    fmt: str = "png",
+) -> Sequence[str]:
+    """Rasterise DOCX (or similar) to images placed in out_dir and return their paths.
+
+    Images are named as page-<N>.<ext> with pages starting at 1. If `pool` is given, the PDF
+    conversion runs on one of its soffice instances.
+    """
+    # Write conversion outputs into a temp directory to avoid any IO oddities
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(doc_path, convert_tmp_dir, pool, cache_dir)
+        # Perform rasterization while the temp PDF still exists
+        return rasterize_pdf(pdf_path, out_dir, dpi, jobs=jobs, fmt=fmt)
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def render_batch(
+    input_paths: Sequence[str],
+    out_dirs: Sequence[str],
+    width: int,
+    height: int,
+    fmt: str = "png",
+    jobs: int | None = None,
+    cache_dir: str | None = None,
+    dpi_override: int | None = None,
+    soffice_workers: int = 0,
+) -> list[dict[str, Any]]:
+    """Render many inputs, sharing soffice calls and rasterising on a worker pool.
+
+    Inputs are converted CONVERT_BATCH_SIZE at a time with one LibreOffice profile, or with
+    `soffice_workers` > 0 through a SofficePool of that many persistent UNO instances. Each PDF
+    is rasterised by one of `jobs` workers (one pdftoppm each) while the next chunk converts.
+    Returns one summary per input, in order, with timings in seconds and an "error" string
+    for failures. Conversion time is the chunk's soffice time split evenly across its files.
+    """
+    summaries: list[dict[str, Any]] = [
+        {
+            "input": path,
+            "output_dir": out_dir,
+            "pages": 0,
+            "convert_s": 0.0,
+            "rasterize_s": 0.0,
+            "error": None,
+        }
+        for path, out_dir in zip(input_paths, out_dirs)
+    ]
+
+    def rasterize_one(i: int, pdf_path: str) -> None:
+        start = time.perf_counter()
+        try:
+            dpi = choose_dpi(input_paths[i], pdf_path, width, height, dpi_override)
+            paths = rasterize_pdf(pdf_path, out_dirs[i], dpi, jobs=1, fmt=fmt)
+            summaries[i]["pages"] = len(paths)
+        except Exception as e:
+            summaries[i]["error"] = f"{type(e).__name__}: {e}"
+        summaries[i]["rasterize_s"] = round(time.perf_counter() - start, 3)
+
+    def convert_chunk(paths: list[str], chunk_dir: str) -> dict[str, str]:
+        if pool is None:
+            return convert_batch_to_pdf(paths, user_profile, chunk_dir)
+        makedirs(chunk_dir, exist_ok=True)
+        # Pool workers export one file each; the index keeps same-named inputs apart.
+        with ThreadPoolExecutor(max_workers=soffice_workers) as converters:
+            pdfs = converters.map(
+                lambda k: pool.convert_to_pdf(
+                    paths[k], chunk_dir, f"{k}-{splitext(basename(paths[k]))[0]}"
+                ),
+                range(len(paths)),
+            )
+            return dict(zip(paths, pdfs))
+
+    with (
+        tempfile.TemporaryDirectory(prefix="soffice_profile_") as user_profile,
+        tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir,
+        SofficePool(soffice_workers) if soffice_workers > 0 else nullcontext() as pool,
+        ThreadPoolExecutor(max_workers=max(1, jobs or usable_cpus())) as executor,
+    ):
+        futures = []
+        for chunk_start in range(0, len(input_paths), CONVERT_BATCH_SIZE):
+            chunk = range(chunk_start, min(chunk_start + CONVERT_BATCH_SIZE, len(input_paths)))
+            pdf_paths: dict[int, str] = {}
+            cached_pdfs: dict[int, str] = {}
+            for i in chunk:
+                path = input_paths[i]
+                if not exists(path):
+                    summaries[i]["error"] = "Input file not found"
+                elif path.lower().endswith(".pdf"):
+                    pdf_paths[i] = path
+                elif cache_dir:
+                    cached_pdfs[i] = join(cache_dir, f"docx-{file_digest(path)}.pdf")
+                    if exists(cached_pdfs[i]):
+                        pdf_paths[i] = cached_pdfs.pop(i)
+            todo = [i for i in chunk if i not in pdf_paths and summaries[i]["error"] is None]
+            if todo:
+                start = time.perf_counter()
+                converted = convert_chunk(
+                    [input_paths[i] for i in todo], join(convert_tmp_dir, f"chunk-{chunk_start}")
+                )
+                convert_s = round((time.perf_counter() - start) / len(todo), 3)
+                for i in todo:
+                    summaries[i]["convert_s"] = convert_s
+                    pdf_path = converted[input_paths[i]]
+                    if not pdf_path or not exists(pdf_path):
+                        summaries[i]["error"] = "Failed to produce PDF for rasterization."
+                        continue
+                    if i in cached_pdfs:
+                        store_cached_pdf(pdf_path, cached_pdfs[i])
+                    pdf_paths[i] = pdf_path
+            futures += [executor.submit(rasterize_one, i, p) for i, p in pdf_paths.items()]
+        for future in futures:
+            future.result()
+    return summaries
+
+
+# Mirrored in home/oai/share/slides/render_slides.py; keep both copies in sync.
+def batch_output_dirs(input_paths: Sequence[str], output_root: str | None) -> list[str]:
+    """One output directory per input: <output_root>/<stem>, or next to the input without a
+    root. Colliding names get a numeric suffix."""
+    out_dirs: list[str] = []
+    for path in input_paths:
+        base = join(output_root, splitext(basename(path))[0]) if output_root else splitext(path)[0]
+        out_dir, n = base, 2
+        while out_dir in out_dirs:
+            out_dir, n = f"{base}-{n}", n + 1
+        out_dirs.append(out_dir)
+    return out_dirs
+
+
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Render DOCX-like file to PNG images.")
+    parser = argparse.ArgumentParser(description="Render DOCX-like file to images.")
     parser.add_argument(
         "input_path",
         type=str,
-        help="Path to the input DOCX file (or compatible).",
+        nargs="+",
+        help=(
+            "Path to the input DOCX file (or compatible). Several files or a directory render "
+            "in batch mode: shared soffice calls, pooled rasterisation and a JSON summary on "
+            "stdout."
+        ),
     )
     parser.add_argument(
         "--output_dir",
@@ -250,23 +948,107 @@ def main() -> None:
         default=None,
         help=("Override computed DPI. If provided, skips DOCX/PDF-based DPI calculation."),
     )
+    parser.add_argument(
+        "--format",
+        choices=sorted(IMAGE_EXTS),
+        default="png",
+        help="Output image format (default: png). JPEG and WebP are smaller for previews.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help=(
+            "Rasterise in windows of --window pages and print each page image path on its own "
+            "line as soon as it is written, in page order."
+        ),
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=STREAM_WINDOW_PAGES,
+        help=f"Pages per window with --stream (default {STREAM_WINDOW_PAGES}).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help=(
+            "Maximum number of concurrent rasterization processes. Defaults to the number of "
+            "usable CPUs, further limited by page count and a memory budget."
+        ),
+    )
+    parser.add_argument(
+        "--soffice_workers",
+        type=int,
+        default=0,
+        help=(
+            "Batch mode only: convert through this many persistent LibreOffice instances driven "
+            "over UNO (needs LibreOffice's Python bindings) instead of batched soffice calls."
+        ),
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help=(
+            "Directory for a PDF cache keyed by the input's content hash. Re-rendering an "
+            "unchanged file then skips LibreOffice."
+        ),
+    )
     args = parser.parse_args()
 
-    input_path = abspath(expanduser(args.input_path))
+    input_paths: list[str] = []
+    batch = len(args.input_path) > 1
+    for raw_path in args.input_path:
+        path = abspath(expanduser(raw_path))
+        if isdir(path):
+            names = sorted(n for n in listdir(path) if n.lower().endswith(BATCH_EXTS))
+            input_paths += [join(path, n) for n in names if not n.startswith(".~lock")]
+            batch = True
+        else:
+            input_paths.append(path)
+    if batch:
+        if args.stream:
+            parser.error("--stream needs a single input file")
+        output_root = abspath(expanduser(args.output_dir)) if args.output_dir else None
+        start = time.perf_counter()
+        summaries = render_batch(
+            input_paths,
+            batch_output_dirs(input_paths, output_root),
+            args.width,
+            args.height,
+            fmt=args.format,
+            jobs=args.jobs,
+            cache_dir=abspath(expanduser(args.cache_dir)) if args.cache_dir else None,
+            dpi_override=args.dpi,
+            soffice_workers=args.soffice_workers,
+        )
+        failed = sum(1 for summary in summaries if summary["error"])
+        elapsed_s = round(time.perf_counter() - start, 3)
+        print(json.dumps({"files": summaries, "failed": failed, "elapsed_s": elapsed_s}, indent=2))
+        if failed:
+            raise SystemExit(1)
+        return
+
+    if args.soffice_workers:
+        parser.error("--soffice_workers needs several input files or a directory")
+    input_path = input_paths[0]
     out_dir = abspath(expanduser(args.output_dir)) if args.output_dir else splitext(input_path)[0]
+    cache_dir = abspath(expanduser(args.cache_dir)) if args.cache_dir else None
 
-    if args.dpi is not None:
-        dpi = int(args.dpi)
-    else:
-        try:
-            if input_path.lower().endswith((".docx", ".docm", ".dotx", ".dotm")):
-                dpi = calc_dpi_via_ooxml_docx(input_path, args.width, args.height)
-            else:
-                raise RuntimeError("Skip OOXML DPI; not a DOCX container")
-        except Exception:
-            dpi = calc_dpi_via_pdf(input_path, args.width, args.height)
+    # The PDF is produced once and shared by the DPI computation and rasterization.
+    with tempfile.TemporaryDirectory(prefix="soffice_convert_") as convert_tmp_dir:
+        pdf_path = produce_pdf(input_path, convert_tmp_dir, cache_dir=cache_dir)
+        dpi = choose_dpi(input_path, pdf_path, args.width, args.height, args.dpi)
 
-    rasterize(input_path, out_dir, dpi)
+        if args.stream:
+            for path in iter_rasterize_pdf(
+                pdf_path, out_dir, dpi, args.window, jobs=args.jobs, fmt=args.format
+            ):
+                print(path, flush=True)
+            return
+        rasterize_pdf(pdf_path, out_dir, dpi, jobs=args.jobs, fmt=args.format)
     print("Pages rendered to " + out_dir)
 
 
@@ -0,0 +1,90 @@
+"""Thin client for the apply_patch daemon (`combined_apply_patch_cli.py --serve`).
+
+Only the standard library is imported here so that, when the daemon is running, an edit
+costs one interpreter startup plus a socket round trip. If no daemon is listening, the
+patch is applied in-process with the full CLI.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+
+
+def default_socket_path() -> str:
+    """Same as combined_apply_patch_cli.default_socket_path(); keep the two in sync."""
+    if os.environ.get("APPLY_PATCH_SOCKET"):
+        return os.environ["APPLY_PATCH_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "apply_patch.sock")
+    return os.path.join(tempfile.gettempdir(), f"apply_patch-{os.getuid()}", "apply_patch.sock")
+
+
+SOCKET_PATH = default_socket_path()
+
+
+def peer_uid(sock: socket.socket) -> int:
+    """User id of the process at the other end of a connected Unix socket."""
+    if hasattr(socket, "SO_PEERCRED"):
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)[1]
+    # Without peer credentials, trust whoever owns the socket file.
+    return os.stat(SOCKET_PATH).st_uid
+
+
+def request_daemon(patch_text: str, args: list[str]) -> dict | None:
+    """Send the patch to the daemon and return its response, or None if it is not running.
+
+    The response holds the run's "output" (stdout), "stderr" and exit "status".
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+    except OSError:
+        sock.close()
+        return None
+    # Patch text and cwd only go to a daemon run by this user; otherwise apply in-process.
+    if peer_uid(sock) != os.getuid():
+        sock.close()
+        sys.stderr.write(f"Ignoring {SOCKET_PATH}: the daemon belongs to another user\n")
+        return None
+    # Once connected, never fall back: the daemon may already have applied the patch.
+    with sock:
+        request = {"cwd": os.getcwd(), "args": args, "patch": patch_text}
+        sock.sendall(json.dumps(request).encode())
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+    return json.loads(b"".join(chunks))
+
+
+def main():
+    args = sys.argv[1:]
+    if "--serve" in args or "-h" in args or "--help" in args:
+        import combined_apply_patch_cli
+
+        combined_apply_patch_cli.main()
+        return
+
+    patch_text = sys.stdin.read()
+    response = request_daemon(patch_text, args)
+    if response is not None:
+        sys.stdout.write(response["output"])
+        sys.stderr.write(response.get("stderr", ""))
+        sys.exit(response.get("status", 0))
+
+    import combined_apply_patch_cli
+
+    parsed = combined_apply_patch_cli.build_arg_parser().parse_args(args)
+    combined_apply_patch_cli.run(patch_text, parsed)
+
+
+if __name__ == "__main__":
+    main()
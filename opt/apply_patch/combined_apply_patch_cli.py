@@ -56,10 +56,16 @@ class Chunk(BaseModel):
     ins_lines: list[str] = Field(default_factory=list)
 
 
+class HunkMatch(BaseModel):
+    orig_index: int  # line index in the original file where the hunk context matched
+    fuzz: int = 0
+
+
 class PatchAction(BaseModel):
     type: ActionType
     new_file: str | None = None
     chunks: list[Chunk] = Field(default_factory=list)
+    hunks: list[HunkMatch] = Field(default_factory=list)
     move_path: str | None = None
 
 
@@ -70,8 +76,14 @@ class Patch(BaseModel):
 from pydantic import BaseModel, Field
 
 
+def strip_cr(lines: list[str]) -> list[str]:
+    """Drop the "\r" that hunk lines copied from a CRLF file keep; file text is LF-only."""
+    return [s[:-1] if s.endswith("\r") else s for s in lines]
+
+
 class Parser(BaseModel):
     current_files: dict[str, str] = Field(default_factory=dict)
+    crlf_files: set[str] = Field(default_factory=set)
     lines: list[str] = Field(default_factory=list)
     index: int = 0
     patch: Patch = Field(default_factory=Patch)
@@ -111,6 +123,13 @@ class Parser(BaseModel):
                 if path not in self.current_files:
                     raise DiffError(f"Update File Error: Missing File: {path}")
                 text = self.current_files[path]
+                if path in self.crlf_files:
+                    end = self.index
+                    while end < len(self.lines) and not self.lines[end].startswith(
+                        ("*** End Patch", "*** Update File:", "*** Delete File:", "*** Add File:")
+                    ):
+                        end += 1
+                    self.lines[self.index : end] = strip_cr(self.lines[self.index : end])
                 action = self.parse_update_file(text)
                 # TODO: Check move_to is valid
                 action.move_path = move_to
@@ -148,6 +167,8 @@ class Parser(BaseModel):
         )
         lines = text.split("\n")
         index = 0
+        # Header line positions, built on first use: {strip: {line: [indices]}}
+        line_indexes: dict[bool, dict[str, list[int]]] = {}
         while not self.is_done(
             (
                 "*** End Patch",
@@ -165,36 +186,36 @@ class Parser(BaseModel):
                     self.index += 1
             if not (def_str or section_str or index == 0):
                 raise DiffError(f"Invalid Line:\n{self.lines[self.index]}")
-            if def_str.strip():
-                found = False
-                if not [s for s in lines[:index] if s == def_str]:
-                    # def str is a skip ahead operator
-                    for i, s in enumerate(lines[index:], index):
-                        if s == def_str:
-                            # print(f"Jump ahead @@: {index} -> {i}: {def_str}")
-                            index = i + 1
-                            found = True
-                            break
-                if not found and not [s for s in lines[:index] if s.strip() == def_str.strip()]:
-                    # def str is a skip ahead operator
-                    for i, s in enumerate(lines[index:], index):
-                        if s.strip() == def_str.strip():
-                            # print(f"Jump ahead @@: {index} -> {i}: {def_str}")
-                            index = i + 1
-                            self.fuzz += 1
-                            found = True
-                            break
+            hint, def_str = parse_line_hint(def_str)
             next_chunk_context, chunks, end_patch_index, eof = peek_next_section(
                 self.lines, self.index
             )
             next_chunk_text = "\n".join(next_chunk_context)
-            new_index, fuzz = find_context(lines, next_chunk_context, index, eof)
+            header_fuzz = 0
+            if match_hint(lines, next_chunk_context, index, hint):
+                assert hint is not None
+                new_index, fuzz = hint, 0
+            else:
+                if def_str.strip():
+                    for strip, strip_fuzz in ((False, 0), (True, 1)):
+                        if strip not in line_indexes:
+                            line_indexes[strip] = build_line_index(lines, strip)
+                        key = def_str.strip() if strip else def_str
+                        new_header = skip_ahead(line_indexes[strip].get(key, []), index)
+                        if new_header != -1:
+                            # def str is a skip ahead operator
+                            # print(f"Jump ahead @@: {index} -> {new_header}: {def_str}")
+                            index = new_header + 1
+                            header_fuzz = strip_fuzz
+                            break
+                new_index, fuzz = find_context(lines, next_chunk_context, index, eof)
             if new_index == -1:
                 if eof:
                     raise DiffError(f"Invalid EOF Context {index}:\n{next_chunk_text}")
                 else:
                     raise DiffError(f"Invalid Context {index}:\n{next_chunk_text}")
-            self.fuzz += fuzz
+            self.fuzz += header_fuzz + fuzz
+            action.hunks.append(HunkMatch(orig_index=new_index, fuzz=header_fuzz + fuzz))
             # print(f"Jump ahead: {index} -> {new_index}")
             for ch in chunks:
                 ch.orig_index += new_index
@@ -250,6 +271,49 @@ def find_context(lines: list[str], context: list[str], start: int, eof: bool) ->
     return find_context_core(lines, context, start)
 
 
+def match_hint(lines: list[str], context: list[str], start: int, hint: int | None) -> bool:
+    # An exact match at the hinted line index makes the search O(len(context)).
+    return (
+        hint is not None
+        and start <= hint <= len(lines)
+        and lines[hint : hint + len(context)] == context
+    )
+
+
+def find_context_with_hint(
+    lines: list[str], context: list[str], start: int, eof: bool, hint: int | None
+) -> tuple[int, int]:
+    if match_hint(lines, context, start, hint):
+        assert hint is not None
+        return hint, 0
+    return find_context(lines, context, start, eof)
+
+
+def build_line_index(lines: list[str], strip: bool) -> dict[str, list[int]]:
+    line_index: dict[str, list[int]] = {}
+    for i, s in enumerate(lines):
+        line_index.setdefault(s.strip() if strip else s, []).append(i)
+    return line_index
+
+
+def skip_ahead(positions: list[int], index: int) -> int:
+    """Return the first position at or after index, or -1.
+
+    A header that already occurred before index is not a skip ahead operator.
+    """
+    if not positions or positions[0] < index:
+        return -1
+    return positions[0]
+
+
+def parse_line_hint(def_str: str) -> tuple[int | None, str]:
+    """Split an optional `-L[,N] [+L[,N]] @@` line hint off an `@@ ` header."""
+    m = LINE_HINT_RE.match(def_str)
+    if not m:
+        return None, def_str
+    return int(m.group(1)) - 1, m.group(2) or ""
+
+
 def peek_next_section(lines: list[str], index: int) -> tuple[list[str], list[Chunk], int, bool]:
     old: list[str] = []
     del_lines: list[str] = []
@@ -323,13 +387,16 @@ def peek_next_section(lines: list[str], index: int) -> tuple[list[str], list[Chu
     return old, chunks, index, False
 
 
-def text_to_patch(text: str, orig: dict[str, str]) -> tuple[Patch, int]:
+def text_to_patch(
+    text: str, orig: dict[str, str], crlf_files: set[str] | None = None
+) -> tuple[Patch, int]:
     lines = text.strip().split("\n")
     if len(lines) < 2 or not lines[0].startswith("*** Begin Patch") or lines[-1] != "*** End Patch":
         raise DiffError("Invalid patch text")
 
     parser = Parser(
         current_files=orig,
+        crlf_files=crlf_files or set(),
         lines=lines,
         index=1,
     )
@@ -357,6 +424,218 @@ def identify_files_added(text: str) -> list[str]:
     return list(result)
 
 
+import re
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+LINE_HINT_RE = re.compile(r"^-(\d+)(?:,\d+)?(?: \+\d+(?:,\d+)?)?(?: @@(?: (.*))?)?$")
+
+
+class UnifiedHunk(BaseModel):
+    hint: int  # line index in the original file where the hunk starts
+    lines: list[str] = Field(default_factory=list)
+
+
+class UnifiedFileDiff(BaseModel):
+    old_path: str | None = None
+    new_path: str | None = None
+    has_file_header: bool = False
+    git: bool = False  # introduced by a "diff --git" line
+    renamed: bool = False
+    hunks: list[UnifiedHunk] = Field(default_factory=list)
+
+
+def is_unified_diff(text: str) -> bool:
+    if text.startswith("*** Begin Patch"):
+        return False
+    return re.search(r"^(diff --git |--- |@@ -\d)", text, re.MULTILINE) is not None
+
+
+def _strip_diff_path(path: str) -> str | None:
+    path = path.split("\t")[0].strip()
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        path = path[1:-1]
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        return path[2:]
+    return path
+
+
+def _read_unified_hunk(lines: list[str], index: int) -> tuple[UnifiedHunk, int]:
+    m = HUNK_HEADER_RE.match(lines[index])
+    if not m:
+        raise DiffError(f"Invalid Hunk Header: {lines[index]}")
+    old_start = int(m.group(1))
+    old_count = int(m.group(2)) if m.group(2) is not None else 1
+    new_count = int(m.group(4)) if m.group(4) is not None else 1
+    # A zero-length old range means "insert after line old_start".
+    hunk = UnifiedHunk(hint=old_start - 1 if old_count else old_start)
+    index += 1
+    old_no_newline = False
+    new_no_newline = False
+    prefix = " "
+    while old_count > 0 or new_count > 0 or (index < len(lines) and lines[index][:1] == "\\"):
+        if index >= len(lines):
+            raise DiffError("Unexpected end of unified diff inside a hunk")
+        s = lines[index]
+        index += 1
+        if s.startswith("\\"):
+            # "\ No newline at end of file" applies to the side(s) of the previous line.
+            old_no_newline = old_no_newline or prefix in (" ", "-")
+            new_no_newline = new_no_newline or prefix in (" ", "+")
+            continue
+        prefix = s[:1] or " "
+        if prefix == " ":
+            old_count -= 1
+            new_count -= 1
+        elif prefix == "-":
+            old_count -= 1
+        elif prefix == "+":
+            new_count -= 1
+        else:
+            raise DiffError(f"Invalid Hunk Line: {s}")
+        hunk.lines.append(prefix + s[1:])
+    # Files are split on "\n", so a trailing newline shows up as a final empty line.
+    if old_no_newline and not new_no_newline:
+        hunk.lines.append("+")
+    elif new_no_newline and not old_no_newline:
+        hunk.lines.append("-")
+    return hunk, index
+
+
+def parse_unified_diff(text: str) -> list[UnifiedFileDiff]:
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    diffs: list[UnifiedFileDiff] = []
+    current: UnifiedFileDiff | None = None
+    index = 0
+    while index < len(lines):
+        s = lines[index]
+        if s.startswith("diff --git "):
+            current = UnifiedFileDiff(git=True)
+            m = re.match(r"diff --git a/(.*) b/(.*)$", s)
+            if m:
+                current.old_path, current.new_path = m.group(1), m.group(2)
+            diffs.append(current)
+            index += 1
+        elif (
+            s.startswith("--- ") and index + 1 < len(lines) and lines[index + 1].startswith("+++ ")
+        ):
+            if current is None or current.has_file_header:
+                current = UnifiedFileDiff()
+                diffs.append(current)
+            current.old_path = _strip_diff_path(s[4:])
+            current.new_path = _strip_diff_path(lines[index + 1][4:])
+            current.has_file_header = True
+            index += 2
+        elif s.startswith("@@ "):
+            if current is None or not current.has_file_header:
+                raise DiffError(f"Hunk without file header: {s}")
+            hunk, index = _read_unified_hunk(lines, index)
+            current.hunks.append(hunk)
+        elif current is not None and s.startswith("new file mode"):
+            current.old_path = None
+            index += 1
+        elif current is not None and s.startswith("deleted file mode"):
+            current.new_path = None
+            index += 1
+        elif current is not None and s.startswith("rename from "):
+            current.old_path = s[len("rename from ") :]
+            current.renamed = True
+            index += 1
+        elif current is not None and s.startswith("rename to "):
+            current.new_path = s[len("rename to ") :]
+            current.renamed = True
+            index += 1
+        elif s.startswith(("copy from ", "GIT binary patch", "Binary files ")):
+            raise DiffError(f"Unsupported unified diff line: {s}")
+        else:
+            # index/mode/similarity lines and any leading commit message
+            index += 1
+    return diffs
+
+
+def identify_files_needed_unified(text: str) -> list[str]:
+    """Every path named by the diff; only the ones that exist are loaded."""
+    paths = set()
+    for d in parse_unified_diff(text):
+        paths.update(p for p in (d.old_path, d.new_path) if p is not None)
+    return list(paths)
+
+
+def _unified_diff_target(d: UnifiedFileDiff, orig: dict[str, str]) -> str | None:
+    """The file a diff entry modifies.
+
+    Git diffs always name the original in old_path. For plain diffs, choose like patch(1):
+    the new name if it exists, else the existing name, else the shorter name.
+    """
+    if d.git or d.new_path is None or d.old_path is None:
+        return d.old_path if d.old_path is not None else d.new_path
+    if d.new_path in orig:
+        return d.new_path
+    if d.old_path in orig:
+        return d.old_path
+    return min((d.new_path, d.old_path), key=len)
+
+
+def _unified_hunks_to_action(
+    lines: list[str], hunks: list[UnifiedHunk], path: str, crlf: bool = False
+) -> tuple[PatchAction, int]:
+    action = PatchAction(type=ActionType.UPDATE)
+    index = 0
+    total_fuzz = 0
+    for hunk in hunks:
+        hunk_lines = strip_cr(hunk.lines) if crlf else hunk.lines
+        context, chunks, _, _ = peek_next_section(hunk_lines, 0)
+        new_index, fuzz = find_context_with_hint(lines, context, index, False, hunk.hint)
+        if new_index == -1:
+            context_text = "\n".join(context)
+            raise DiffError(f"Invalid Context {path}:{hunk.hint + 1}:\n{context_text}")
+        total_fuzz += fuzz
+        action.hunks.append(HunkMatch(orig_index=new_index, fuzz=fuzz))
+        for ch in chunks:
+            ch.orig_index += new_index
+            action.chunks.append(ch)
+        index = new_index + len(context)
+    return action, total_fuzz
+
+
+def unified_diff_to_patch(
+    text: str, orig: dict[str, str], crlf_files: set[str] | None = None
+) -> tuple[Patch, int]:
+    patch = Patch()
+    fuzz = 0
+    for d in parse_unified_diff(text):
+        path = _unified_diff_target(d, orig)
+        if path is None:
+            raise DiffError("Unified diff entry without a file path")
+        if path in patch.actions:
+            raise DiffError(f"Unified Diff Error: Duplicate Path: {path}")
+        if d.old_path is None:
+            if path in orig:
+                raise DiffError(f"Add File Error: File already exists: {path}")
+            # Additions are applied as hunks against an empty file.
+            action, _ = _unified_hunks_to_action([""], d.hunks, path)
+            new_file = _get_updated_file(text="", action=action, path=path)
+            patch.actions[path] = PatchAction(type=ActionType.ADD, new_file=new_file)
+            continue
+        if path not in orig:
+            raise DiffError(f"Unified Diff Error: Missing File: {path}")
+        if d.new_path is None:
+            patch.actions[path] = PatchAction(type=ActionType.DELETE)
+            continue
+        action, action_fuzz = _unified_hunks_to_action(
+            orig[path].split("\n"), d.hunks, path, crlf=path in (crlf_files or ())
+        )
+        # Plain diffs often name a backup copy on one side, so only git renames move files.
+        if d.renamed and d.new_path != d.old_path:
+            action.move_path = d.new_path
+        patch.actions[path] = action
+        fuzz += action_fuzz
+    return patch, fuzz
+
+
 def _get_updated_file(text: str, action: PatchAction, path: str) -> str:
     assert action.type == ActionType.UPDATE
     orig_lines = text.split("\n")
@@ -419,6 +698,7 @@ class DiffError(ValueError):
     pass
 
 
+import difflib
 import os
 from typing import Callable
 
@@ -430,6 +710,17 @@ def load_files(paths: list[str], open_fn: Callable) -> dict[str, str]:
     return orig
 
 
+def load_existing_files(paths: list[str], open_fn: Callable) -> dict[str, str]:
+    """load_files() that skips missing paths; callers decide whether a missing file is an error."""
+    orig = {}
+    for path in paths:
+        try:
+            orig[path] = open_fn(path)
+        except FileNotFoundError:
+            continue
+    return orig
+
+
 def apply_commit(commit: Commit, write_fn: Callable, remove_fn: Callable) -> None:
     for path, change in commit.changes.items():
         if change.type == ActionType.DELETE:
@@ -444,19 +735,149 @@ def apply_commit(commit: Commit, write_fn: Callable, remove_fn: Callable) -> Non
                 write_fn(path, change.new_content)
 
 
-def process_patch(text: str, open_fn: Callable, write_fn: Callable, remove_fn: Callable) -> str:
-    assert text.startswith("*** Begin Patch")
-    paths = identify_files_needed(text)
-    orig = load_files(paths, open_fn)
-    patch, fuzz = text_to_patch(text, orig)
+def crlf_paths(orig: dict[str, str]) -> set[str]:
+    """Loaded files that open_file() read as CRLF and normalized to LF."""
+    return {
+        path
+        for path in orig
+        if file_formats.get(os.path.abspath(path), FileFormat()).newline == "\r\n"
+    }
+
+
+def text_to_commit(text: str, open_fn: Callable) -> tuple[Patch, Commit, int]:
+    if is_unified_diff(text):
+        paths = identify_files_needed_unified(text)
+        orig = load_existing_files(paths, open_fn)
+        patch, fuzz = unified_diff_to_patch(text, orig, crlf_paths(orig))
+    else:
+        if not text.startswith("*** Begin Patch"):
+            raise DiffError("Invalid patch text: expected '*** Begin Patch' or a unified diff")
+        paths = identify_files_needed(text)
+        orig = load_files(paths, open_fn)
+        patch, fuzz = text_to_patch(text, orig, crlf_paths(orig))
     commit = patch_to_commit(patch, orig)
+    return patch, commit, fuzz
+
+
+def _split_keepends(text: str | None) -> list[str]:
+    # Like splitlines(keepends=True), but only "\n" ends a line, as in the files' own splitting.
+    if not text:
+        return []
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def unified_diff(path: str, change: FileChange) -> str:
+    from_file = f"a/{path}" if change.type != ActionType.ADD else "/dev/null"
+    if change.type == ActionType.DELETE:
+        to_file = "/dev/null"
+    else:
+        to_file = f"b/{change.move_path or path}"
+    diff = difflib.unified_diff(
+        _split_keepends(change.old_content),
+        _split_keepends(change.new_content),
+        from_file,
+        to_file,
+    )
+    out = []
+    for line in diff:
+        out.append(line)
+        if not line.endswith("\n"):
+            out.append("\n\\ No newline at end of file\n")
+    return "".join(out)
+
+
+def patch_report(patch: Patch, commit: Commit, fuzz: int) -> dict:
+    files = []
+    for path, change in commit.changes.items():
+        action = patch.actions[path]
+        files.append(
+            {
+                "path": path,
+                "type": change.type.value,
+                "move_path": change.move_path or None,
+                # Line numbers are 1-based, matching the unified diff.
+                "hunks": [{"line": h.orig_index + 1, "fuzz": h.fuzz} for h in action.hunks],
+                "diff": unified_diff(path, change),
+            }
+        )
+    return {"ok": True, "fuzz": fuzz, "files": files}
+
+
+def check_patch(text: str, open_fn: Callable) -> dict:
+    """Run the full parse and commit pipeline without writing and describe the result."""
+    patch, commit, fuzz = text_to_commit(text, open_fn)
+    return patch_report(patch, commit, fuzz)
+
+
+def process_patch(text: str, open_fn: Callable, write_fn: Callable, remove_fn: Callable) -> str:
+    patch, commit, fuzz = text_to_commit(text, open_fn)
+    for path, change in commit.changes.items():
+        # A moved file keeps the encoding and line endings it was read with.
+        if change.move_path and os.path.abspath(path) in file_formats:
+            file_formats[os.path.abspath(change.move_path)] = file_formats[os.path.abspath(path)]
     apply_commit(commit, write_fn, remove_fn)
     return "Done!"
 
 
+import codecs
+
+
+class FileFormat(BaseModel):
+    encoding: str = "utf-8"
+    errors: str = "strict"
+    bom: bytes = b""
+    newline: str = "\n"
+
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    # UTF-32 LE must be tested before UTF-16 LE, which is a prefix of it.
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Formats of the files read by open_file, keyed by absolute path, for write_file.
+file_formats: dict[str, FileFormat] = {}
+
+
+def decode_file(data: bytes) -> tuple[str, FileFormat]:
+    fmt = FileFormat()
+    # Slicing the memoryview skips the BOM without copying the file contents.
+    view = memoryview(data)
+    for bom, encoding in BOMS:
+        if view[: len(bom)] == bom:
+            fmt.bom = bom
+            fmt.encoding = encoding
+            break
+    if fmt.encoding == "utf-8":
+        # Bytes that are not valid UTF-8 round-trip unchanged as lone surrogates.
+        fmt.errors = "surrogateescape"
+    text = str(view[len(fmt.bom) :], fmt.encoding, fmt.errors)
+    crlf = text.count("\r\n")
+    # Only consistent CRLF files are normalized; mixed endings are left untouched.
+    if crlf and crlf == text.count("\n"):
+        fmt.newline = "\r\n"
+        text = text.replace("\r\n", "\n")
+    return text, fmt
+
+
+def encode_file(text: str, fmt: FileFormat) -> bytes:
+    if fmt.newline != "\n":
+        text = text.replace("\n", fmt.newline)
+    return fmt.bom + text.encode(fmt.encoding, fmt.errors)
+
+
 def open_file(path: str) -> str:
-    with open(path, "rt") as f:
-        return f.read()
+    with open(path, "rb") as f:
+        text, fmt = decode_file(f.read())
+    file_formats[os.path.abspath(path)] = fmt
+    return text
 
 
 def write_file(path: str, content: str) -> None:
@@ -466,21 +887,77 @@ def write_file(path: str, content: str) -> None:
     if "/" in path:
         parent = "/".join(path.split("/")[:-1])
         os.makedirs(parent, exist_ok=True)
-    with open(path, "wt") as f:
-        f.write(content)
+    fmt = file_formats.get(os.path.abspath(path), FileFormat())
+    with open(path, "wb") as f:
+        f.write(encode_file(content, fmt))
 
 
 def remove_file(path: str) -> None:
     os.remove(path)
 
 
-def main():
-    import sys
+import argparse
+import json
+import socket
+import stat
+import sys
+import tempfile
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+
+def default_socket_path() -> str:
+    """Per-user socket path: $XDG_RUNTIME_DIR, else a 0700 directory in the temp dir.
+
+    Kept in sync with apply_patch_client.default_socket_path().
+    """
+    if os.environ.get("APPLY_PATCH_SOCKET"):
+        return os.environ["APPLY_PATCH_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "apply_patch.sock")
+    return os.path.join(tempfile.gettempdir(), f"apply_patch-{os.getuid()}", "apply_patch.sock")
+
+
+DEFAULT_SOCKET_PATH = default_socket_path()
 
-    patch_text = sys.stdin.read()
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Apply a patch read from stdin.")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a long-lived daemon that applies patches sent over a Unix socket.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET_PATH,
+        help=f"Unix socket path for --serve (default: {DEFAULT_SOCKET_PATH}).",
+    )
+    parser.add_argument(
+        "--check",
+        "--dry-run",
+        dest="check",
+        action="store_true",
+        help="Validate the patch without writing and print a JSON report with a unified diff.",
+    )
+    return parser
+
+
+def run(patch_text: str, args: argparse.Namespace) -> None:
     if not patch_text:
         print("Please pass patch text through stdin")
         return
+    file_formats.clear()
+    if args.check:
+        try:
+            report = check_patch(patch_text, open_file)
+        except (DiffError, OSError) as e:
+            # Missing or unreadable files are reported like any other rejected patch.
+            report = {"ok": False, "error": str(e)}
+        print(json.dumps(report, indent=2))
+        return
     try:
         result = process_patch(patch_text, open_file, write_file, remove_file)
     except DiffError as e:
@@ -489,5 +966,112 @@ def main():
     print(result)
 
 
+def recv_all(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        data = conn.recv(65536)
+        if not data:
+            break
+        chunks.append(data)
+    return b"".join(chunks)
+
+
+def handle_request(request: dict) -> dict:
+    """Run one client request and return its stdout, stderr and exit status.
+
+    The status matches what the in-process CLI would exit with.
+    """
+    # Paths in a patch are relative to the client's working directory.
+    out = StringIO()
+    err = StringIO()
+    status = 0
+    prev_cwd = os.getcwd()
+    try:
+        os.chdir(request["cwd"])
+        with redirect_stdout(out), redirect_stderr(err):
+            args = build_arg_parser().parse_args(request.get("args", []))
+            run(request["patch"], args)
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            err.write(e.code + "\n")
+        status = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception:
+        err.write(traceback.format_exc())
+        status = 1
+    finally:
+        os.chdir(prev_cwd)
+    return {"output": out.getvalue(), "stderr": err.getvalue(), "status": status}
+
+
+def prepare_socket_path(socket_path: str) -> None:
+    """Make sure the socket can be bound safely, removing a stale socket from a dead daemon.
+
+    The directory is created 0700 if missing. It must belong to the current user (or root)
+    and, if others can write to it, be sticky, so nobody else can swap the socket. An existing
+    file is only removed if it is a socket nobody listens on; a live daemon or any other file
+    is an error.
+    """
+    socket_dir = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    dir_stat = os.lstat(socket_dir)
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid not in (os.getuid(), 0):
+        raise RuntimeError(f"Socket directory {socket_dir} is not a directory owned by this user")
+    if dir_stat.st_mode & 0o022 and not dir_stat.st_mode & stat.S_ISVTX:
+        raise RuntimeError(f"Socket directory {socket_dir} is writable by other users")
+    try:
+        path_stat = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(path_stat.st_mode):
+        raise RuntimeError(f"{socket_path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"An apply_patch daemon is already listening on {socket_path}")
+
+
+def serve(socket_path: str) -> None:
+    prepare_socket_path(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # The socket is created 0600, so no other user can connect between bind() and listen().
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    server.listen()
+    print(f"apply_patch daemon listening on {socket_path}", flush=True)
+    try:
+        # Requests are handled one at a time so concurrent edits never interleave.
+        while True:
+            conn, _ = server.accept()
+            # A malformed request or a client that goes away must not stop the daemon.
+            with conn:
+                try:
+                    response = handle_request(json.loads(recv_all(conn)))
+                except Exception:
+                    response = {"output": "", "stderr": traceback.format_exc(), "status": 1}
+                try:
+                    conn.sendall(json.dumps(response).encode())
+                except OSError:
+                    pass
+    finally:
+        server.close()
+        os.remove(socket_path)
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    if args.serve:
+        serve(args.socket)
+        return
+    run(sys.stdin.read(), args)
+
+
 if __name__ == "__main__":
     main()